@@ -1,29 +1,26 @@
-from hashlib import md5
 from pathlib import Path
+import sys
 from time import time
 
+sys.path.append(str(Path(__file__).parent.parent))
+from md5search import find  # noqa: E402
+
 YEAR = 2015
 DAY = 4
 NAME = "The Ideal Stocking Stuffer"
 
 
-def solve(input: str, prefix: str) -> int:
-    n = 0
-    while True:
-        key = input.strip() + str(n)
-        h = md5(key.encode("utf-8"))
-        if h.hexdigest().startswith(prefix):
-            break
-        n += 1
+def solve(input: str, zeros: int) -> int:
+    n, _ = next(find(input.strip(), zeros))
     return n
 
 
 def part1(input: str) -> int:
-    return solve(input, "00000")
+    return solve(input, 5)
 
 
 def part2(input: str) -> int:
-    return solve(input, "000000")
+    return solve(input, 6)
 
 
 def main() -> None:
@@ -1,3 +1,6 @@
+from collections.abc import Callable
+from itertools import pairwise
+from operator import mul
 from pathlib import Path
 from time import time
 
@@ -25,56 +28,95 @@ def parse_line(line: str) -> tuple[str, int, int, int, int]:
     return command, src_x, src_y, dst_x, dst_y
 
 
-def part1(input: str) -> int:
-    lights = []
-    for _ in range(1000):
-        lights.append([0] * 1000)
-
-    for line in input.strip().split("\n"):
-        command, src_x, src_y, dst_x, dst_y = parse_line(line)
-
-        if command == "on":
-            for y in range(src_y, dst_y + 1):
-                for x in range(src_x, dst_x + 1):
-                    lights[y][x] = 1
-
-        elif command == "off":
-            for y in range(src_y, dst_y + 1):
-                for x in range(src_x, dst_x + 1):
-                    lights[y][x] = 0
-
-        elif command == "toggle":
-            for y in range(src_y, dst_y + 1):
-                for x in range(src_x, dst_x + 1):
-                    lights[y][x] = 1 - lights[y][x]
-
-    return sum([sum(row) for row in lights])
-
-
-def part2(input: str) -> int:
-    lights = []
-    for _ in range(1000):
-        lights.append([0] * 1000)
-
-    for line in input.strip().split("\n"):
-        command, src_x, src_y, dst_x, dst_y = parse_line(line)
-
-        if command == "on":
-            for y in range(src_y, dst_y + 1):
-                for x in range(src_x, dst_x + 1):
-                    lights[y][x] += 1
-
-        elif command == "off":
-            for y in range(src_y, dst_y + 1):
-                for x in range(src_x, dst_x + 1):
-                    lights[y][x] = max(lights[y][x] - 1, 0)
-
-        elif command == "toggle":
-            for x in range(src_x, dst_x + 1):
-                for y in range(src_y, dst_y + 1):
-                    lights[y][x] += 2
-
-    return sum([sum(row) for row in lights])
+def switch_table(func: Callable[[int], int]) -> bytes:
+    """
+    Builds a translation table applying a command to every light in a slice of
+    a row at once with `bytearray.translate`. States that a rule can't reach
+    (e.g. toggling a light at 2) are clamped rather than used.
+    """
+    return bytes(max(0, min(func(i), 255)) for i in range(256))
+
+
+# Rules for each command, each a function on the state of a single light and
+# the most it can increase that state by (to know when a row would overflow
+# its bytes)
+SWITCH_RULES: dict[str, tuple[Callable[[int], int], int]] = {
+    "on": (lambda _: 1, 0),
+    "off": (lambda _: 0, 0),
+    "toggle": (lambda v: 1 - v, 0),
+}
+BRIGHTNESS_RULES: dict[str, tuple[Callable[[int], int], int]] = {
+    "on": (lambda v: v + 1, 1),
+    "off": (lambda v: max(v - 1, 0), 0),
+    "toggle": (lambda v: v + 2, 2),
+}
+
+
+def total_lights(
+        input: str,
+        rules: dict[str, tuple[Callable[[int], int], int]],
+        size: int = 1000,
+        compress: bool = False
+) -> int:
+    """
+    Applies every instruction to the grid and returns the total of the lights.
+    Each row is a bytearray, and each instruction is applied to a row a slice
+    at a time with a translation table rather than a light at a time. A row is
+    only converted to a list of ints if the lights in it could have been
+    increased past 255.
+    When compressed, rows and columns are only split at the edges of the
+    instruction rectangles, with each cell of the grid then representing a
+    block of lights that are always in the same state. The cost then depends
+    on the number of instructions rather than the size of the grid.
+    """
+    instructions = [parse_line(line) for line in input.strip().split("\n")]
+    tables = {command: switch_table(f) for command, (f, _) in rules.items()}
+
+    if compress:
+        xs = sorted({0, size} | {x for _, x0, _, x1, _ in instructions
+                                 for x in (x0, x1 + 1)})
+        ys = sorted({0, size} | {y for _, _, y0, _, y1 in instructions
+                                 for y in (y0, y1 + 1)})
+    else:
+        xs = ys = list(range(size + 1))
+    x_indices = {x: i for i, x in enumerate(xs)}
+    y_indices = {y: i for i, y in enumerate(ys)}
+
+    rows: list[bytearray | list[int]] = [
+        bytearray(len(xs) - 1) for _ in range(len(ys) - 1)
+    ]
+    # Most that any light in each row could be
+    maxima = [0] * len(rows)
+
+    for command, src_x, src_y, dst_x, dst_y in instructions:
+        func, increase = rules[command]
+        table = tables[command]
+        x0, x1 = x_indices[src_x], x_indices[dst_x + 1]
+
+        for y in range(y_indices[src_y], y_indices[dst_y + 1]):
+            row = rows[y]
+            maxima[y] += increase
+            if isinstance(row, bytearray) and maxima[y] > 255:
+                row = rows[y] = list(row)
+            if isinstance(row, bytearray):
+                row[x0:x1] = row[x0:x1].translate(table)
+            else:
+                row[x0:x1] = map(func, row[x0:x1])
+
+    widths = [b - a for a, b in pairwise(xs)]
+    heights = [b - a for a, b in pairwise(ys)]
+    if compress:
+        return sum(h * sum(map(mul, row, widths))
+                   for row, h in zip(rows, heights))
+    return sum(sum(row) for row in rows)
+
+
+def part1(input: str, compress: bool = False) -> int:
+    return total_lights(input, SWITCH_RULES, compress=compress)
+
+
+def part2(input: str, compress: bool = False) -> int:
+    return total_lights(input, BRIGHTNESS_RULES, compress=compress)
 
 
 def main() -> None:
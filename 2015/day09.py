@@ -1,11 +1,14 @@
-from itertools import permutations
 from pathlib import Path
 from time import time
 
+from heldkarp import distance_matrix, route_extremes
+
 YEAR = 2015
 DAY = 9
 NAME = "All in a Single Night"
 
+CACHEABLE = ("find_distances",)
+
 
 def parse_input(input: str) -> tuple[set[str], dict[tuple[str, str], int]]:
     locations: set[str] = set()
@@ -22,26 +25,23 @@ def parse_input(input: str) -> tuple[set[str], dict[tuple[str, str], int]]:
     return locations, distances
 
 
-def find_distances(
-    locations: set[str],
-    distances: dict[tuple[str, str], int]
-) -> tuple[int, int]:
-    shortest, longest = float("inf"), float("-inf")
-    for route in permutations(locations, len(locations)):
-        distance = sum([distances[(a, b)] for a, b in zip(route, route[1:])])
-        shortest, longest = min(shortest, distance), max(longest, distance)
-    return int(shortest), int(longest)
+def find_distances(input: str) -> tuple[int, int]:
+    """
+    Finds both the shortest and longest routes in one pass, which the runner
+    caches (see CACHEABLE) so that both parts share the work.
+    """
+    locations, distances = parse_input(input)
+    matrix = distance_matrix(sorted(locations), distances)
+    return route_extremes(matrix, cycle=False)
 
 
 def part1(input: str) -> int:
-    locations, distances = parse_input(input)
-    shortest, _ = find_distances(locations, distances)
+    shortest, _ = find_distances(input)
     return shortest
 
 
 def part2(input: str) -> int:
-    locations, distances = parse_input(input)
-    _, _longest = find_distances(locations, distances)
+    _, _longest = find_distances(input)
     return _longest
 
 
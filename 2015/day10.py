@@ -1,5 +1,7 @@
+from operator import mul
 from pathlib import Path
 from time import time
+from typing import Optional
 
 YEAR = 2015
 DAY = 10
@@ -103,12 +105,91 @@ ELEMENTS = {
 SEQUENCES_TO_ELEMENTS = {v[0]: k for k, v in ELEMENTS.items()}
 
 
-def solve(elements: str, iters: int, i: int = 0) -> int:
-    for _ in range(iters):
-        elements = ".".join(ELEMENTS[e][1] for e in elements.split("."))
-    return sum(
-        len(s) for s in [ELEMENTS[e][0] for e in elements.split(".")]
-    )
+ELEMENT_INDICES = {e: i for i, e in enumerate(ELEMENTS)}
+
+# Indices of the elements each element decays into, i.e. the sparse rows of
+# the transition matrix
+DECAYS = [
+    [ELEMENT_INDICES[d] for d in decay.split(".")]
+    for _, decay in ELEMENTS.values()
+]
+
+LENGTHS = [len(sequence) for sequence, _ in ELEMENTS.values()]
+
+# Beyond this, repeatedly squaring the transition matrix beats stepping
+MAX_STEPS = 10000
+
+Matrix = list[list[int]]
+
+
+def element_counts(elements: str) -> list[int]:
+    counts = [0] * len(ELEMENTS)
+    for e in elements.split("."):
+        counts[ELEMENT_INDICES[e]] += 1
+    return counts
+
+
+def step(counts: list[int]) -> list[int]:
+    """
+    Advances the count of each element by one iteration, a sparse
+    vector-matrix product with the transition matrix.
+    """
+    next_counts = [0] * len(counts)
+    for i, count in enumerate(counts):
+        if count:
+            for j in DECAYS[i]:
+                next_counts[j] += count
+    return next_counts
+
+
+def transition_matrix() -> Matrix:
+    matrix = [[0] * len(ELEMENTS) for _ in ELEMENTS]
+    for i, decay in enumerate(DECAYS):
+        for j in decay:
+            matrix[i][j] += 1
+    return matrix
+
+
+def matrix_multiply(a: Matrix, b: Matrix, modulus: Optional[int]) -> Matrix:
+    columns = list(zip(*b))
+    product = [[sum(map(mul, row, col)) for col in columns] for row in a]
+    if modulus is not None:
+        product = [[v % modulus for v in row] for row in product]
+    return product
+
+
+def solve(elements: str, iters: int, modulus: Optional[int] = None) -> int:
+    """
+    Tracks only the count of each of the 92 elements, rather than the
+    sequence itself, and returns the length of the sequence after the given
+    number of iterations (modulo `modulus`, if given).
+    Up to a point the counts are just stepped forwards. Beyond that the number
+    of iterations is handled in logarithmic steps, applying successive squares
+    of the transition matrix to the vector of element lengths. Exact lengths
+    grow by ~30% per iteration, so very large numbers of iterations are only
+    practical with a modulus.
+    """
+    counts = element_counts(elements)
+
+    if iters <= MAX_STEPS:
+        for _ in range(iters):
+            counts = step(counts)
+            if modulus is not None:
+                counts = [c % modulus for c in counts]
+        length: int = sum(map(mul, counts, LENGTHS))
+    else:
+        # Length contributed by each element after the iterations so far
+        lengths = [[length] for length in LENGTHS]
+        matrix = transition_matrix()
+        while iters:
+            if iters & 1:
+                lengths = matrix_multiply(matrix, lengths, modulus)
+            iters >>= 1
+            if iters:
+                matrix = matrix_multiply(matrix, matrix, modulus)
+        length = sum(c * n for c, (n,) in zip(counts, lengths))
+
+    return length if modulus is None else length % modulus
 
 
 def part1(input: str) -> int:
@@ -1,7 +1,9 @@
+from collections.abc import Iterator
+from functools import cache
 from pathlib import Path
-import re
 import string
 from time import time
+from typing import Optional
 
 YEAR = 2015
 DAY = 11
@@ -14,47 +16,94 @@ CHARS = string.ascii_lowercase.translate({
 })
 
 
-def increment_password(pw: str) -> str:
-    for i in range(len(pw) - 1, -1, -1):
-        if pw[i] == "z":
-            pw = pw[:i] + "a" + pw[i+1:]
-        else:
-            pw = pw[:i] + CHARS[CHARS.index(pw[i]) + 1] + pw[i+1:]
-            break
-    return pw
+# Last two letters, whether there's been a straight yet, and the letters of
+# the pairs so far (only up to the two needed)
+State = tuple[str, str, bool, frozenset[str]]
 
+START: State = ("", "", False, frozenset())
 
-def is_password_valid(pw: str) -> bool:
-    """
-    NOTE: Rules evaluated in the order that generally discards
-    naively incremented password as soon as possible.
-    """
-    # Rule 3: Two different non-overlapping pairs
-    pairs = set(re.findall(r'(.)\1', pw))
-    if len(pairs) < 2:
-        return False
 
-    # Rule 1: Increasing straights of three
-    for i in range(len(pw) - 2):
-        a, b, c = pw[i], pw[i + 1], pw[i + 2]
-        a_pos, b_pos, c_pos = CHARS.index(a), CHARS.index(b), CHARS.index(c)
-        if a_pos == b_pos - 1 and b_pos == c_pos - 1:
-            break
-    else:
-        return False
+def advance(state: State, c: str) -> State:
+    prev2, prev1, straight, pairs = state
+    if prev2 and ord(prev2) + 2 == ord(prev1) + 1 == ord(c):
+        straight = True
+    if c == prev1 and len(pairs) < 2:
+        pairs = pairs | {c}
+    return prev1, c, straight, pairs
 
-    # Rule 2: No confusing letters
-    if re.search(r'iol', pw):
-        return False
 
-    return True
+@cache
+def smallest_suffix(state: State, length: int) -> Optional[str]:
+    """
+    Returns the (alphabetically) smallest string of allowed letters of the
+    given length that completes a valid password from the state of the
+    letters before it, if there is one.
+    """
+    prev2, prev1, straight, pairs = state
+    if length == 0:
+        return "" if straight and len(pairs) == 2 else None
+
+    # Give up early if there aren't enough letters left for the pairs or the
+    # straight on their own, counting any start made on them already
+    needed = 2 * (2 - len(pairs))
+    if needed and prev1 and prev1 not in pairs:
+        needed -= 1
+    if not straight:
+        started = 0
+        if prev1 and chr(ord(prev1) + 1) in CHARS:
+            started = 1
+            if prev2 and ord(prev2) + 1 == ord(prev1):
+                started = 2
+            elif chr(ord(prev1) + 2) not in CHARS:
+                started = 0
+        needed = max(needed, 3 - started)
+    if needed > length:
+        return None
+
+    for c in CHARS:
+        suffix = smallest_suffix(advance(state, c), length - 1)
+        if suffix is not None:
+            return c + suffix
+
+    return None
+
+
+def passwords(pw: str) -> Iterator[str]:
+    """
+    Yields the valid passwords following the given one, in order.
+    Rather than incrementing and checking every candidate, each one is built
+    directly: increase the rightmost letter that can be increased (skipping
+    confusing letters, and anything after the first confusing letter already
+    in the password) and follow it with the smallest valid completion, so the
+    cost of each is independent of the gap between them.
+    """
+    while True:
+        # State after each prefix of the password without confusing letters
+        states = [START]
+        for c in pw:
+            if c not in CHARS:
+                break
+            states.append(advance(states[-1], c))
+
+        for i in range(min(len(states), len(pw)) - 1, -1, -1):
+            candidate = next((
+                pw[:i] + c + suffix
+                for c in CHARS if c > pw[i]
+                for suffix in [smallest_suffix(advance(states[i], c),
+                                               len(pw) - i - 1)]
+                if suffix is not None
+            ), None)
+            if candidate is not None:
+                break
+        else:
+            return
+
+        pw = candidate
+        yield pw
 
 
 def next_password(pw: str) -> str:
-    while True:
-        pw = increment_password(pw)
-        if is_password_valid(pw):
-            return pw
+    return next(passwords(pw))
 
 
 def part1(input: str) -> str:
@@ -1,5 +1,8 @@
 import json
+import mmap
+import os
 from pathlib import Path
+import re
 from time import time
 from typing import Optional, Union
 
@@ -8,36 +11,81 @@ DAY = 12
 NAME = "JSAbacusFramework.io"
 
 
-def sum_numbers(
-    value: Union[str | int | list | dict],
-    ignore: Optional[str] = None,
-) -> int:
-    total = 0
-
-    if isinstance(value, list):
-        for v in value:
-            total += sum_numbers(v, ignore)
+# Strings (and whether they're object keys), numbers (and any fraction or
+# exponent, which isn't counted) and brackets. Everything else, punctuation
+# and literals, is skipped over.
+TOKENS = re.compile(
+    rb'"((?:[^"\\]|\\.)*)"(\s*:)?'
+    rb"|(-?\d+)([.eE][-+.\deE]*)?"
+    rb"|[\[\]{}]"
+)
 
-    elif isinstance(value, dict):
-        if ignore not in value.values():
-            for v in value.values():
-                total += sum_numbers(v, ignore)
+ARRAY, OBJECT, IGNORED = range(3)
 
-    elif isinstance(value, int):
-        total += value
 
-    return total
+def sum_numbers(
+    data: Union[str, bytes, mmap.mmap],
+    ignore: Optional[str] = None,
+) -> int:
+    """
+    Sums the integers in a JSON document, skipping any object (and everything
+    in it) with a value of `ignore`.
+    The document is tokenized as it goes rather than loaded, keeping only the
+    partial sum of each container that's currently open, so memory is bounded
+    by the depth of nesting rather than the size of the document.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    ignored = ignore.encode("utf-8") if ignore is not None else None
+
+    # The document as a whole is summed like an array
+    stack = [[0, ARRAY]]
+    for token in TOKENS.finditer(data):
+        c = token[0][:1]
+        if c == b'"':
+            if (
+                ignored is not None
+                and stack[-1][1] == OBJECT
+                and token[2] is None
+            ):
+                value = token[1]
+                if b"\\" in value:
+                    value = json.loads(b'"' + value + b'"').encode("utf-8")
+                if value == ignored:
+                    stack[-1][1] = IGNORED
+        elif c == b"[":
+            stack.append([0, ARRAY])
+        elif c == b"{":
+            stack.append([0, OBJECT])
+        elif c == b"]" or c == b"}":
+            total, kind = stack.pop()
+            if kind != IGNORED:
+                stack[-1][0] += total
+        elif token[4] is None:
+            stack[-1][0] += int(token[3])
+
+    return stack[0][0]
+
+
+def sum_file(path: Path, ignore: Optional[str] = None) -> int:
+    """
+    Sums the integers in a JSON file, through a memory map so that the file
+    needn't be read in.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return sum_numbers(data, ignore)
 
 
 def part1(input: str) -> int:
-    data = json.loads(input)
-    total = sum_numbers(data)
+    total = sum_numbers(input)
     return total
 
 
 def part2(input: str) -> int:
-    data = json.loads(input)
-    total = sum_numbers(data, "red")
+    total = sum_numbers(input, "red")
     return total
 
 
@@ -1,7 +1,8 @@
-from itertools import permutations
 from pathlib import Path
 from time import time
 
+from heldkarp import distance_matrix, route_extremes
+
 YEAR = 2015
 DAY = 13
 NAME = "Knights of the Dinner Table"
@@ -22,17 +23,13 @@ def parse_line(line: str) -> tuple[str, str, int]:
 
 
 def max_happiness(P: set[str], H: dict[tuple[str, str], int]) -> int:
-    max_happiness = float("-inf")
-
-    for group in permutations(P, len(P)):
-        h = 0
-        for i in range(len(group)):
-            j = (i + 1) % len(group)
-            k = (i - 1) % len(group)
-            h += H[(group[i], group[j])] + H[(group[i], group[k])]
-        max_happiness = max(max_happiness, h)
-
-    return int(max_happiness)
+    """
+    Each pair of neighbours contributes the change in happiness of both, so
+    this is the longest cycle over the symmetric sums of those changes.
+    """
+    W = {(a, b): H[(a, b)] + H[(b, a)] for a in P for b in P if a != b}
+    _, longest = route_extremes(distance_matrix(sorted(P), W), cycle=True)
+    return longest
 
 
 def part1(input: str) -> int:
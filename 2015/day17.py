@@ -1,3 +1,4 @@
+from collections.abc import Iterator
 from pathlib import Path
 from time import time
 
@@ -6,36 +7,68 @@ DAY = 17
 NAME = "No Such Thing as Too Much"
 
 
-def container_combinations(n: int, C: list[int]) -> set[tuple[int, ...]]:
-    def _combinations(n: int, result: tuple[int, ...], i: int = 0) -> None:
-        if n > 0:
-            for j in range(i, len(C)):
-                if C[j] <= n:
-                    _combinations(n - C[j], result + (j,), j+1)
-                else:
-                    _combinations(n, result, j+1)
-        else:
-            results.add(result)
+def combination_counts(n: int, C: list[int]) -> list[list[int]]:
+    """
+    Returns a table of the number of combinations of containers holding
+    exactly each volume up to `n`, by the number of containers used: the
+    count for `k` containers and volume `v` is at `[k][v]`.
+    Containers are added one at a time, counting down through the volumes (and
+    numbers of containers) so that each is only used once.
+    """
+    counts = [[0] * (n + 1) for _ in range(len(C) + 1)]
+    counts[0][0] = 1
+    for i, c in enumerate(C):
+        for k in range(i + 1, 0, -1):
+            fewer, row = counts[k - 1], counts[k]
+            for v in range(n, c - 1, -1):
+                row[v] += fewer[v - c]
+    return counts
 
-    results: set[tuple[int, ...]] = set()
-    _combinations(n, tuple())
-    return results
+
+def container_combinations(
+        n: int,
+        C: list[int]
+) -> Iterator[tuple[int, ...]]:
+    """
+    Yields the indices of the containers in each combination holding exactly
+    `n`, lazily.
+    A table of the number of ways of making up each volume from each suffix of
+    the containers means only choices that lead to a combination are followed.
+    """
+    ways = [[0] * (n + 1) for _ in range(len(C))] + [[1] + [0] * n]
+    for i in range(len(C) - 1, -1, -1):
+        ways[i] = ways[i + 1][:]
+        for v in range(C[i], n + 1):
+            ways[i][v] += ways[i + 1][v - C[i]]
+
+    def _combinations(
+            n: int,
+            result: tuple[int, ...],
+            i: int
+    ) -> Iterator[tuple[int, ...]]:
+        if i == len(C):
+            yield result
+            return
+        if C[i] <= n and ways[i + 1][n - C[i]]:
+            yield from _combinations(n - C[i], result + (i,), i + 1)
+        if ways[i + 1][n]:
+            yield from _combinations(n, result, i + 1)
+
+    if ways[0][n]:
+        yield from _combinations(n, tuple(), 0)
 
 
 def part1(input: str) -> int:
     containers = [int(n) for n in input.strip().split("\n")]
-    sorted_containers = sorted(containers, reverse=True)
-    C = container_combinations(150, sorted_containers)
-    result = len(C)
+    counts = combination_counts(150, containers)
+    result = sum(row[150] for row in counts)
     return result
 
 
 def part2(input: str) -> int:
     containers = [int(n) for n in input.strip().split("\n")]
-    sorted_containers = sorted(containers, reverse=True)
-    C = container_combinations(150, sorted_containers)
-    min_num_containers = len(sorted(C)[0])
-    result = len([c for c in C if len(c) == min_num_containers])
+    counts = combination_counts(150, containers)
+    result = next(row[150] for row in counts if row[150])
     return result
 
 
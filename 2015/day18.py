@@ -6,67 +6,96 @@ DAY = 18
 NAME = "Like a GIF For Your Yard"
 
 
-def simulate(
-    lights: dict[tuple[int, int], int],
-    x_max: int,
-    y_max: int,
-    iters: int,
-    always_on: set[tuple[int, int]]
-) -> dict[tuple[int, int], int]:
-    neighbours = [
-        (-1, -1), (0, -1), (1, -1),
-        (-1, 0),           (1, 0),
-        (-1, 1),  (0, 1),  (1, 1),
-    ]
-    for _ in range(iters):
-        updated: dict[tuple[int, int], int] = dict()
-        for y in range(y_max):
-            for x in range(x_max):
-                neighbours_lit = sum(
-                    [lights.get((x+n[0], y+n[1]), 0) for n in neighbours]
-                )
-                if (x, y) in always_on:
-                    updated[(x, y)] = 1
-                else:
-                    if lights[(x, y)] == 1:
-                        updated[(x, y)] = 1 if neighbours_lit in (2, 3) else 0
-                    else:
-                        updated[(x, y)] = 1 if neighbours_lit == 3 else 0
-        lights = updated
-    return lights
-
-
-def part1(input: str) -> int:
-    lights: dict[tuple[int, int], int] = dict()
-
-    for y, line in enumerate(input.strip().split("\n")):
+class Grid:
+    """
+    A grid of lights held as a single int, one bit per light, with row `y`
+    starting at bit `y * stride`. Each row is followed by an extra, always off,
+    column so that shifting lights sideways can't wrap them onto the next row.
+    """
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.stride = width + 1
+        row = (1 << width) - 1
+        self.mask = sum(row << y * self.stride for y in range(height))
+        self.shifts = [
+            d * self.stride + dx for d in (-1, 0, 1) for dx in (-1, 0, 1)
+            if (d, dx) != (0, 0)
+        ]
+
+    def bit(self, x: int, y: int) -> int:
+        return 1 << (y * self.stride + x)
+
+    def corners(self) -> int:
+        return (
+            self.bit(0, 0) | self.bit(self.width - 1, 0)
+            | self.bit(0, self.height - 1)
+            | self.bit(self.width - 1, self.height - 1)
+        )
+
+    def step(self, lights: int) -> int:
+        """
+        Counts every light's lit neighbours at once, bit-sliced: adding each of
+        the eight shifted grids into a 3-bit counter per light with half
+        adders (8 wraps round to 0, which is as dead as it needs to be).
+        """
+        ones = twos = fours = 0
+        for shift in self.shifts:
+            neighbours = lights << shift if shift > 0 else lights >> -shift
+            carry = ones & neighbours
+            ones ^= neighbours
+            fours ^= twos & carry
+            twos ^= carry
+        # On with 3 neighbours, or 2 if already on
+        return twos & ~fours & (ones | lights) & self.mask
+
+    def simulate(self, lights: int, iters: int, stuck: int = 0) -> int:
+        """
+        Runs the given number of steps, with the `stuck` lights always on.
+        Cycles are found with Brent's algorithm, which keeps a single saved
+        grid and re-saves it at each power of two steps; once the lights
+        return to it, the remaining steps are skipped down to the remainder
+        of the cycle.
+        """
+        lights |= stuck
+        saved, saved_at, power = lights, 0, 1
+        i = 0
+        while i < iters:
+            lights = self.step(lights) | stuck
+            i += 1
+            if lights == saved:
+                period = i - saved_at
+                for _ in range((iters - i) % period):
+                    lights = self.step(lights) | stuck
+                break
+            if i - saved_at == power:
+                saved, saved_at = lights, i
+                power *= 2
+        return lights
+
+
+def parse(input: str) -> tuple[Grid, int]:
+    rows = input.strip().split("\n")
+    grid = Grid(len(rows[0]), len(rows))
+    lights = 0
+    for y, line in enumerate(rows):
         for x, char in enumerate(line):
-            lights[(x, y)] = 1 if char == "#" else 0
-
-    x_max, y_max = x + 1, y + 1
+            if char == "#":
+                lights |= grid.bit(x, y)
+    return grid, lights
 
-    lights = simulate(lights, x_max, y_max, 100, set())
 
-    lights_on = sum(lights.values())
+def part1(input: str) -> int:
+    grid, lights = parse(input)
+    lights = grid.simulate(lights, 100)
+    lights_on = lights.bit_count()
     return lights_on
 
 
 def part2(input: str) -> int:
-    lights: dict[tuple[int, int], int] = dict()
-
-    for y, line in enumerate(input.strip().split("\n")):
-        for x, char in enumerate(line):
-            lights[(x, y)] = 1 if char == "#" else 0
-
-    x_max, y_max = x + 1, y + 1
-
-    stuck_on = {(0, 0), (x_max-1, 0), (0, y_max-1), (x_max-1, y_max-1)}
-    for s in stuck_on:
-        lights[s] = 1
-
-    lights = simulate(lights, x_max, y_max, 100, stuck_on)
-
-    lights_on = sum(lights.values())
+    grid, lights = parse(input)
+    lights = grid.simulate(lights, 100, grid.corners())
+    lights_on = lights.bit_count()
     return lights_on
 
 
@@ -2,85 +2,202 @@ from collections import defaultdict
 from pathlib import Path
 import re
 from time import time
+from typing import Optional
 
 YEAR = 2015
 DAY = 19
 NAME = "Medicine for Rudolph"
 
 
-def parse_input(input: str) -> tuple[dict[str, set[str]], str]:
-    replacements_str, start = input.strip().split("\n\n")
+# Elements are a capital letter and maybe a lower case one, apart from the
+# starting electron
+ELEMENT = re.compile(r"[A-Z][a-z]?|e")
 
-    replacements: dict[str, set[str]] = defaultdict(set)
-    for r in replacements_str.split("\n"):
-        a, b = r.split(" => ")
-        replacements[a].add(b)
+Molecule = tuple[int, ...]
 
-    return replacements, start
 
+class Elements:
+    """
+    Numbers the elements as they're first seen, so molecules can be held as
+    tuples of element IDs.
+    """
+    def __init__(self) -> None:
+        self.ids: dict[str, int] = dict()
 
-def replace_once(s: str, replacements: dict[str, set[str]]) -> set[str]:
-    molecules: set[str] = set()
+    def tokenize(self, molecule: str) -> Molecule:
+        return tuple(
+            self.ids.setdefault(e, len(self.ids))
+            for e in ELEMENT.findall(molecule)
+        )
 
-    for k, V in replacements.items():
-        for v in V:
-            for match in re.finditer(k, s):
-                s1 = s[:match.span()[0]]
-                s2 = v
-                s3 = s[match.span()[1]:]
-                replaced = s1 + s2 + s3
-                molecules.add(replaced)
 
-    return molecules
+def parse_input(
+        input: str
+) -> tuple[Elements, dict[int, set[Molecule]], Molecule]:
+    replacements_str, start = input.strip().split("\n\n")
 
+    elements = Elements()
+    replacements: dict[int, set[Molecule]] = defaultdict(set)
+    for r in replacements_str.split("\n"):
+        a, b = r.split(" => ")
+        replacements[elements.ids.setdefault(a, len(elements.ids))].add(
+            elements.tokenize(b))
 
-def min_replacements_to_molecule(
-    current: str,
-    target: str,
-    replacements: dict[str, str],
-    total_steps: int = 0
-) -> int:
-    if current == target:
-        return total_steps
-    else:
-        # Find all possible transformations for the current molecule using each
-        # replacement as many times as possible consecutively, then use the
-        # shortest resulting molecule as the next molecule to transform.
-        # NOTE: This is completely input dependent and doesn't work on (for
-        # example) the example in the puzzle description.
-        transformations: list[tuple[str, int]] = list()
-        for k, v in replacements.items():
-            steps = current.count(k)
-            if steps > 0:
-                transformed = current.replace(k, v)
-                transformations.append((transformed, steps))
-
-        for transformed, steps in sorted(transformations,
-                                         key=lambda item: len(item[0]),
-                                         reverse=True):
-            return min_replacements_to_molecule(
-                transformed, target, replacements, total_steps+steps)
-
-        return int(float("inf"))
+    return elements, replacements, elements.tokenize(start)
 
 
-def part1(input: str) -> int:
-    replacements, start = parse_input(input)
-    molecules = replace_once(start, replacements)
+def count_replacements(
+        molecule: Molecule,
+        replacements: dict[int, set[Molecule]]
+) -> int:
+    """
+    Counts the distinct molecules made by replacing any one element of the
+    molecule, without building them.
+    Each result is identified by how much of the start and end of the original
+    it shares and the different part in between, which is at most the
+    replacement itself, so equal molecules from replacements in different
+    places (e.g. HOH => HOOH, either way) come out the same.
+    """
+    n = len(molecule)
+    molecules: set[tuple[int, int, Molecule]] = set()
+
+    for i, e in enumerate(molecule):
+        for r in replacements.get(e, ()):
+            m = n + len(r) - 1
+            shift = len(r) - 1
+
+            def replaced(k: int) -> int:
+                if k < i:
+                    return molecule[k]
+                if k < i + len(r):
+                    return r[k - i]
+                return molecule[k - shift]
+
+            # Shared with the start of the original, then with the end
+            prefix = i
+            while prefix < min(n, m) and replaced(prefix) == molecule[prefix]:
+                prefix += 1
+            suffix = 0
+            while (
+                prefix + suffix < min(n, m)
+                and replaced(m - suffix - 1) == molecule[n - suffix - 1]
+            ):
+                suffix += 1
+
+            middle = tuple(replaced(k) for k in range(prefix, m - suffix))
+            molecules.add((prefix, suffix, middle))
+
     return len(molecules)
 
 
-def part2(input: str) -> int:
-    replacements, start = parse_input(input)
+class Grammar:
+    """
+    The replacements as a grammar in (near) Chomsky normal form, for finding
+    the fewest replacements that make a molecule from scratch by parsing it.
+    Each replacement `A => B C D ...` becomes `A => B X` at a cost of one step,
+    where the free `X => C Y`, ..., `Z => ... D` make up the rest of it (shared
+    between replacements that end the same way). Replacements of one element by
+    another are kept as unit rules. The tail symbols are numbered from
+    `elements`, the number of elements, so they can't be mistaken for an
+    element that only appears in the molecule.
+    """
+    def __init__(
+        self, replacements: dict[int, set[Molecule]], elements: int
+    ) -> None:
+        self.symbols = elements
+        self.pairs: dict[tuple[int, int], dict[int, int]] = defaultdict(dict)
+        self.units: dict[int, list[int]] = defaultdict(list)
+        tails: dict[Molecule, int] = dict()
+
+        def add_pair(a: int, b: int, parent: int, cost: int) -> None:
+            rules = self.pairs[(a, b)]
+            rules[parent] = min(cost, rules.get(parent, cost))
+
+        def tail(r: Molecule) -> int:
+            if len(r) == 1:
+                return r[0]
+            if r not in tails:
+                tails[r] = self.symbols
+                self.symbols += 1
+                add_pair(r[0], tail(r[1:]), tails[r], 0)
+            return tails[r]
+
+        for a, R in replacements.items():
+            for r in R:
+                if len(r) == 1:
+                    self.units[r[0]].append(a)
+                else:
+                    add_pair(r[0], tail(r[1:]), a, 1)
+
+    def close(self, cell: dict[int, int]) -> None:
+        """
+        Adds anything a cell's symbols can be made from by unit rules.
+        """
+        queue = list(cell)
+        while queue:
+            b = queue.pop()
+            for a in self.units.get(b, ()):
+                if cell[b] + 1 < cell.get(a, cell[b] + 2):
+                    cell[a] = cell[b] + 1
+                    queue.append(a)
+
+    def min_steps(self, start: int, molecule: Molecule) -> Optional[int]:
+        """
+        Returns the fewest replacements making the molecule from the start
+        element, if it can be made at all.
+        This is a CYK chart parse, keeping the cheapest way of making each
+        symbol over each span of the molecule. Only the spans that something
+        can make are kept, indexed by where they start and end, so combining
+        two spans only looks at ones that actually meet.
+        """
+        n = len(molecule)
+        # Symbols (with their costs) making each span, by start and by end
+        starting: list[dict[int, dict[int, int]]] = [
+            dict() for _ in range(n + 1)]
+        ending: list[dict[int, dict[int, int]]] = [
+            dict() for _ in range(n + 1)]
+
+        for i, e in enumerate(molecule):
+            leaf = {e: 0}
+            self.close(leaf)
+            starting[i][i + 1] = ending[i + 1][i] = leaf
+
+        pairs = self.pairs
+        for length in range(2, n + 1):
+            for i in range(n - length + 1):
+                j = i + length
+                cell: dict[int, int] = dict()
+                for m, left in starting[i].items():
+                    right = ending[j].get(m)
+                    if right is None:
+                        continue
+                    for a, cost_a in left.items():
+                        for b, cost_b in right.items():
+                            rules = pairs.get((a, b))
+                            if rules is None:
+                                continue
+                            for parent, cost in rules.items():
+                                total = cost_a + cost_b + cost
+                                if total < cell.get(parent, total + 1):
+                                    cell[parent] = total
+                if cell:
+                    self.close(cell)
+                    starting[i][j] = ending[j][i] = cell
+
+        return starting[0].get(n, {}).get(start)
 
-    target = "e"
 
-    replacements_reversed: dict[str, str] = dict()
-    for k, V in replacements.items():
-        for v in V:
-            replacements_reversed[v] = k
+def part1(input: str) -> int:
+    _, replacements, molecule = parse_input(input)
+    result = count_replacements(molecule, replacements)
+    return result
+
 
-    result = min_replacements_to_molecule(start, target, replacements_reversed)
+def part2(input: str) -> int:
+    elements, replacements, molecule = parse_input(input)
+    grammar = Grammar(replacements, len(elements.ids))
+    result = grammar.min_steps(elements.ids["e"], molecule)
+    assert result is not None
     return result
 
 
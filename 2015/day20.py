@@ -1,40 +1,101 @@
+from array import array
+from itertools import count
 from pathlib import Path
+import sys
 from time import time
+from typing import Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+from parallel import ordered_map  # noqa: E402
 
 YEAR = 2015
 DAY = 20
 NAME = "Infinite Elves and Infinite Houses"
 
+# Houses per block, 128KiB of sums
+BLOCK_SIZE = 2 ** 15
+
+
+def block_sums(lo: int, hi: int, limit: Optional[int] = None) -> "array[int]":
+    """
+    Returns the sum of the numbers of the elves visiting each house from `lo`
+    up to `hi`, where each elf visits at most `limit` houses (if given).
+    Elves numbered below the size of the block visit a run of houses in it,
+    stepping through them. Larger elves visit at most one, so are found the
+    other way round: for each multiple `k`, the run of elves whose `k`th house
+    is in the block. Either way only actual visits are counted, and nothing
+    outside the block is held.
+    """
+    size = hi - lo
+    sums = array("I", bytes(4 * size))
+
+    for i in range(1, min(size, hi)):
+        start = max(i, -(-lo // i) * i)
+        stop = hi if limit is None else min(hi, limit * i + 1)
+        for house in range(start - lo, stop - lo, i):
+            sums[house] += i
+
+    k_max = hi // size if limit is None else min(limit, hi // size)
+    for k in range(1, k_max + 1):
+        for i in range(max(size, -(-lo // k)), -(-hi // k)):
+            sums[k * i - lo] += i
+
+    return sums
+
+
+def search_block(
+        lo: int,
+        hi: int,
+        threshold: int,
+        limit: Optional[int]
+) -> Optional[int]:
+    """
+    Returns the first house from `lo` up to `hi` whose elves' numbers sum to at
+    least `threshold`, if there is one.
+    """
+    sums = block_sums(lo, hi, limit)
+    return next(
+        (lo + h for h, total in enumerate(sums) if total >= threshold), None)
+
+
+def first_house(
+        presents: int,
+        per_elf: int,
+        limit: Optional[int] = None,
+        workers: Optional[int] = None,
+        block_size: int = BLOCK_SIZE
+) -> int:
+    """
+    Returns the first house getting at least the given number of presents,
+    with each elf delivering `per_elf` times its number to each house it
+    visits.
+    Blocks of houses are sieved in order across a pool of processes, stopping
+    at the first block with a house getting enough presents. House `threshold`
+    always does (its own elf delivers enough), so the search ends.
+    """
+    threshold = -(-presents // per_elf)
+    blocks = ordered_map(
+        search_block,
+        ((lo, lo + block_size, threshold, limit)
+         for lo in count(1, block_size)),
+        workers)
+    for house in blocks:
+        if house is not None:
+            return house
+
+    raise RuntimeError("Unreachable")
+
 
 def part1(input: str) -> int:
     n = int(input.strip())
-
-    counts = [0] * (n // 10)
-    for i in range(1, (n // 10) + 1):
-        for j in range(i, (n // 10) + 1, i):
-            counts[j-1] += i * 10
-
-    for i, count in enumerate(counts, start=1):
-        if count > n:
-            break
-
-    return i
+    result = first_house(n, 10)
+    return result
 
 
 def part2(input: str) -> int:
     n = int(input.strip())
-
-    counts = [0] * (n // 11)
-    for i in range(1, (n // 11) + 1):
-        for j in range(i, (n // 11) + 1, i):
-            if j <= (i * 50):
-                counts[j-1] += i * 11
-
-    for i, count in enumerate(counts, start=1):
-        if count > n:
-            break
-
-    return i
+    result = first_house(n, 11, limit=50)
+    return result
 
 
 def main() -> None:
@@ -1,7 +1,9 @@
+from array import array
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 from time import time
 from itertools import chain, combinations, product
-from math import ceil
+from typing import Optional
 
 YEAR = 2015
 DAY = 21
@@ -46,61 +48,107 @@ def parse_input(input: str) -> tuple[int, int, int]:
     return hp, damage, armor
 
 
-def solve(input: str) -> tuple[int, int]:
-    boss_hp, boss_damage, boss_armor = parse_input(input)
-
-    weapons = WEAPONS  # Always a weapon
-
-    # Include a choice for no armor
-    armor = chain(
-        [(0, 0, 0),],
-        ARMOR
-    )
-
-    # Include choices for no rings and one ring
-    rings = chain(
-        [((0, 0, 0), (0, 0, 0))],
-        product(RINGS, [(0, 0, 0)]),
-        combinations(RINGS, 2)
-    )
-
-    win_cost_min = float("inf")
-    loss_cost_max = float("-inf")
-
-    for equipment in product(weapons, armor, rings):
-        cost = damage = armor_ = 0
-
-        cost += equipment[0][0]
-        damage += equipment[0][1]
-        armor_ += equipment[0][2]
-
-        cost += equipment[1][0]
-        damage += equipment[1][1]
-        armor_ += equipment[1][2]
-
-        for ring in equipment[2]:
-            cost += ring[0]
-            damage += ring[1]
-            armor_ += ring[2]
-
-        num_player_attacks = ceil(boss_hp / max(damage - boss_armor, 1))
-        num_boss_attacks = ceil(100 / max(boss_damage - armor_, 1))
-
-        if num_player_attacks <= num_boss_attacks:
-            win_cost_min = min(win_cost_min, cost)
-        else:
-            loss_cost_max = max(loss_cost_max, cost)
-
-    return int(win_cost_min), int(loss_cost_max)
+Boss = tuple[int, int, int]
+
+PLAYER_HP = 100
+
+
+def turns_to_kill(hp: int, damage: int, armor: int) -> int:
+    return -(-hp // max(damage - armor, 1))
+
+
+class Shop:
+    """
+    Every loadout the shop sells (a weapon, maybe armor, and up to two rings)
+    as packed arrays of cost, damage and armor, sorted by cost, so that the
+    cheapest win and the most expensive loss are the first found scanning from
+    either end.
+    The outcome of a fight only depends on the loadout's damage and armor, so
+    the cheapest and most expensive loadouts for each combination of them are
+    also kept, for answering many bosses at once.
+    """
+    def __init__(self) -> None:
+        # Include a choice for no armor
+        armor = [(0, 0, 0)] + ARMOR
+
+        # Include choices for no rings and one ring
+        rings = chain(
+            [((0, 0, 0), (0, 0, 0))],
+            product(RINGS, [(0, 0, 0)]),
+            combinations(RINGS, 2)
+        )
+
+        loadouts = sorted(
+            tuple(map(sum, zip(*(w, a, *r))))
+            for w, a, r in product(WEAPONS, armor, list(rings))
+        )
+        self.costs = array("H", [c for c, _, _ in loadouts])
+        self.damages = array("H", [d for _, d, _ in loadouts])
+        self.armors = array("H", [a for _, _, a in loadouts])
+
+        # Cheapest and most expensive loadout by damage and armor
+        self.cost_range: dict[tuple[int, int], tuple[int, int]] = dict()
+        for cost, damage, armor_ in loadouts:
+            lo, hi = self.cost_range.get((damage, armor_), (cost, cost))
+            self.cost_range[(damage, armor_)] = min(lo, cost), max(hi, cost)
+
+    def wins(self, damage: int, armor: int, boss: Boss) -> bool:
+        boss_hp, boss_damage, boss_armor = boss
+        return (
+            turns_to_kill(boss_hp, damage, boss_armor)
+            <= turns_to_kill(PLAYER_HP, boss_damage, armor)
+        )
+
+    def cheapest_win(self, boss: Boss) -> Optional[int]:
+        for i, cost in enumerate(self.costs):
+            if self.wins(self.damages[i], self.armors[i], boss):
+                return cost
+        return None
+
+    def priciest_loss(self, boss: Boss) -> Optional[int]:
+        for i in range(len(self.costs) - 1, -1, -1):
+            if not self.wins(self.damages[i], self.armors[i], boss):
+                return self.costs[i]
+        return None
+
+    def outcomes(
+            self,
+            bosses: Iterable[Boss]
+    ) -> Iterator[tuple[Optional[int], Optional[int]]]:
+        """
+        Yields the cheapest win and the most expensive loss against each boss.
+        Rather than fighting with every loadout, the turns each damage takes
+        to kill the boss and each armor takes to die are worked out once per
+        boss, and compared for each combination of damage and armor.
+        """
+        damages = {d for d, _ in self.cost_range}
+        armors = {a for _, a in self.cost_range}
+        for boss_hp, boss_damage, boss_armor in bosses:
+            kill = {
+                d: turns_to_kill(boss_hp, d, boss_armor) for d in damages}
+            survive = {
+                a: turns_to_kill(PLAYER_HP, boss_damage, a) for a in armors}
+            win: Optional[int] = None
+            loss: Optional[int] = None
+            for (d, a), (lo, hi) in self.cost_range.items():
+                if kill[d] <= survive[a]:
+                    win = lo if win is None else min(win, lo)
+                else:
+                    loss = hi if loss is None else max(loss, hi)
+            yield win, loss
 
 
 def part1(input: str) -> int:
-    win_cost_min, _ = solve(input)
+    boss = parse_input(input)
+    win_cost_min = Shop().cheapest_win(boss)
+    assert win_cost_min is not None
     return win_cost_min
 
 
 def part2(input: str) -> int:
-    _, loss_cost_max = solve(input)
+    boss = parse_input(input)
+    loss_cost_max = Shop().priciest_loss(boss)
+    assert loss_cost_max is not None
     return loss_cost_max
 
 
@@ -1,64 +1,21 @@
-from collections import deque
 from dataclasses import dataclass
+from heapq import heappop, heappush
 from pathlib import Path
 from time import time
+from typing import Optional
 
 YEAR = 2015
 DAY = 22
 NAME = "Wizard Simulator 20XX"
 
 
-@dataclass
-class Player:
-    hp: int
-    armor: int
-    mana: int
-    mana_spent: int
-    shield: int
-    recharge: int
-
-    def copy(self) -> "Player":
-        return Player(
-            self.hp,
-            self.armor,
-            self.mana,
-            self.mana_spent,
-            self.shield,
-            self.recharge
-        )
-
-
-@dataclass
-class Boss:
-    hp: int
-    damage: int
-    poison: int
-
-    def copy(self) -> "Boss":
-        return Boss(self.hp, self.damage, self.poison)
-
-
-@dataclass
-class Game:
-    player: Player
-    boss: Boss
-    is_hard: bool
-
-    def copy(self) -> "Game":
-        return Game(
-            player=self.player.copy(),
-            boss=self.boss.copy(),
-            is_hard=self.is_hard
-        )
-
-
 @dataclass(frozen=True)
 class Spell:
     name: str
     cost: int
 
 
-SPELLS = [
+MAGIC_MISSILE, DRAIN, SHIELD, POISON, RECHARGE = SPELLS = [
     Spell("Magic Missile", 53),
     Spell("Drain", 73),
     Spell("Shield", 113),
@@ -66,6 +23,10 @@ SPELLS = [
     Spell("Recharge", 229)
 ]
 
+# Player hp, player mana, boss hp and the shield, poison and recharge timers,
+# at the start of a player's turn
+State = tuple[int, int, int, int, int, int]
+
 
 def parse_input(input: str) -> tuple[int, int]:
     for line in input.strip().split("\n"):
@@ -78,121 +39,125 @@ def parse_input(input: str) -> tuple[int, int]:
     return hp, damage
 
 
-def can_cast(spell: Spell, game: Game) -> bool:
-    if spell.name == "Magic Missile":
-        return (spell.cost <= game.player.mana)
-    elif spell.name == "Drain":
-        return (spell.cost <= game.player.mana)
-    elif spell.name == "Shield":
-        return (spell.cost <= game.player.mana) and (game.player.shield == 0)
-    elif spell.name == "Poison":
-        return (spell.cost <= game.player.mana) and (game.boss.poison == 0)
-    elif spell.name == "Recharge":
-        return (spell.cost <= game.player.mana) and (game.player.recharge == 0)
-    else:
-        assert False, "Should not get here"
-
-
-def cast_spell(spell: Spell, game: Game) -> None:
-    if spell.name == "Magic Missile":
-        game.boss.hp -= 4
-    elif spell.name == "Drain":
-        game.player.hp += 2
-        game.boss.hp -= 2
-    elif spell.name == "Shield":
-        game.player.shield = 6
-    elif spell.name == "Poison":
-        game.boss.poison = 6
-    elif spell.name == "Recharge":
-        game.player.recharge = 5
-
-    game.player.mana -= spell.cost
-    game.player.mana_spent += spell.cost
-
-
-def apply_effects(game: Game) -> None:
-    player_hp_loss = 1 if game.is_hard else 0
-
-    # Pre-tick value used for these as they apply per tick
-    player_mana_recharged = 101 if game.player.recharge > 0 else 0
-    boss_hp_loss = 3 if game.boss.poison > 0 else 0
-
-    # Post-tick value used for armor as this wears off at the beginning of this
-    # turn/end of the last turn
-    player_armor_boost = 7 if game.player.shield - 1 > 0 else 0
-
-    game.player.hp -= player_hp_loss
-    game.player.armor = player_armor_boost
-    game.player.mana += player_mana_recharged
-    game.player.shield = max(game.player.shield - 1, 0)
-    game.player.recharge = max(game.player.recharge - 1, 0)
-
-    game.boss.hp -= boss_hp_loss
-    game.boss.poison = max(game.boss.poison - 1, 0)
-
-
-def boss_attack(game: Game) -> None:
-    game.player.hp -= max(game.boss.damage - game.player.armor, 1)
-
+def apply_effects(state: State) -> State:
+    hp, mana, boss_hp, shield, poison, recharge = state
+    if poison:
+        boss_hp -= 3
+    if recharge:
+        mana += 101
+    return (
+        hp, mana, boss_hp,
+        max(shield - 1, 0), max(poison - 1, 0), max(recharge - 1, 0)
+    )
 
-def solve(start: Game) -> int:
-    mana_spent_min = float("inf")
 
-    q: deque[tuple[int, Game]] = deque([(0, start)])
+def damage_player(state: State, damage: int) -> Optional[State]:
+    """
+    Returns the state after the player takes the damage, or None if it kills
+    them.
+    """
+    hp, *rest = state
+    if hp <= damage:
+        return None
+    return (hp - damage, *rest)  # type: ignore[return-value]
+
+
+def cast_spell(spell: Spell, state: State) -> Optional[State]:
+    """
+    Returns the state after casting the spell, or None if it can't be cast.
+    """
+    hp, mana, boss_hp, shield, poison, recharge = state
+    if spell.cost > mana:
+        return None
+
+    mana -= spell.cost
+    if spell is MAGIC_MISSILE:
+        boss_hp -= 4
+    elif spell is DRAIN:
+        hp += 2
+        boss_hp -= 2
+    elif spell is SHIELD and not shield:
+        shield = 6
+    elif spell is POISON and not poison:
+        poison = 6
+    elif spell is RECHARGE and not recharge:
+        recharge = 5
+    else:
+        return None
+
+    return hp, mana, boss_hp, shield, poison, recharge
+
+
+def solve(
+        boss_hp: int,
+        boss_damage: int,
+        is_hard: bool
+) -> tuple[int, list[str]]:
+    """
+    Returns the least mana that wins the fight, and the spells that do it.
+    This is Dijkstra's algorithm by mana spent, over the states at the start
+    of each of the player's turns (a player and boss turn being one step), so
+    the first win taken off the queue is the cheapest. Each state is only
+    expanded from the cheapest way of reaching it.
+    """
+    start: State = (50, 500, boss_hp, 0, 0, 0)
+    spent = {start: 0}
+    came_from: dict[State, tuple[State, str]] = dict()
+
+    q: list[tuple[int, State]] = [(0, start)]
     while q:
-        turn, current = q.popleft()
-
-        # Prune search space
-        if current.player.mana_spent > mana_spent_min:
+        mana_spent, state = heappop(q)
+        if mana_spent > spent[state]:
             continue
 
-        apply_effects(current)
-
-        if current.player.hp <= 0:
-            continue
-
-        if current.boss.hp <= 0:
-            mana_spent_min = min(mana_spent_min, current.player.mana_spent)
-            continue
-
-        is_player_turn = turn % 2 == 0
-        if is_player_turn:
-            for spell in SPELLS:
-                if can_cast(spell, current):
-                    next = current.copy()
-                    cast_spell(spell, next)
-                    q.append((turn+1, next))
-        else:
-            next = current.copy()
-            boss_attack(next)
-            q.append((turn+1, next))
-
-    return int(mana_spent_min)
+        # Won in the boss's turn (or by the last spell), or by effects at
+        # the start of the player's turn
+        current = state
+        if current[2] > 0:
+            if is_hard:
+                hard = damage_player(current, 1)
+                if hard is None:
+                    continue
+                current = hard
+            current = apply_effects(current)
+        if current[2] <= 0:
+            spells = []
+            while state != start:
+                state, name = came_from[state]
+                spells.append(name)
+            return mana_spent, spells[::-1]
+
+        for spell in SPELLS:
+            next = cast_spell(spell, current)
+
+            # Boss's turn, unless the spell killed it, the shield protecting
+            # if it's still up after its effect wears down
+            if next is not None and next[2] > 0:
+                next = apply_effects(next)
+                if next[2] > 0:
+                    next = damage_player(
+                        next, max(boss_damage - (7 if next[3] else 0), 1))
+            if next is None:
+                continue
+
+            cost = mana_spent + spell.cost
+            if cost < spent.get(next, cost + 1):
+                spent[next] = cost
+                came_from[next] = (state, spell.name)
+                heappush(q, (cost, next))
+
+    raise RuntimeError("Unwinnable")
 
 
 def part1(input: str) -> int:
     boss_hp, boss_damage = parse_input(input)
-
-    game = Game(
-        player=Player(50, 0, 500, 0, 0, 0),
-        boss=Boss(boss_hp, boss_damage, 0),
-        is_hard=False
-    )
-
-    result = solve(game)
+    result, _ = solve(boss_hp, boss_damage, is_hard=False)
     return result
 
 
 def part2(input: str) -> int:
     boss_hp, boss_damage = parse_input(input)
-
-    game = Game(
-        player=Player(50, 0, 500, 0, 0, 0),
-        boss=Boss(boss_hp, boss_damage, 0),
-        is_hard=True
-    )
-
-    result = solve(game)
+    result, _ = solve(boss_hp, boss_damage, is_hard=True)
     return result
 
 
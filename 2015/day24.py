@@ -1,6 +1,7 @@
-from itertools import combinations
+from itertools import accumulate
 from pathlib import Path
 from time import time
+from typing import Optional
 
 YEAR = 2015
 DAY = 24
@@ -22,32 +23,110 @@ def product(values: tuple[int, ...]) -> int:
     return p
 
 
-def solve(weights: list[int], num_groups: int) -> int:
-    min_qe = float("inf")
-
-    # All groups must have an even weight, so we can simply discard any
-    # combination we find for the first group that doesn't match the target
-    target = sum(weights) // num_groups
-
-    # Start with lower r-length combinations for the first group in order to
-    # get lower potential QE values first
-    for length in range(2, len(weights) - (num_groups - 1)):
-        done = False
-        for combination in combinations(weights, length):
-            if sum(combination) != target:
+def subset_sums(weights: list[int]) -> int:
+    """
+    Returns a bitset of the sums of every subset of the weights, bit `n` being
+    set if some subset sums to `n`.
+    """
+    sums = 1
+    for w in weights:
+        sums |= sums << w
+    return sums
+
+
+def can_split(weights: list[int], num_groups: int, target: int) -> bool:
+    """
+    Checks whether weights summing to `num_groups * target` can be split into
+    that many groups weighing `target` each.
+    For two groups this is just whether any subset weighs `target`. For more,
+    the group with the first weight is tried every way it can be made up, with
+    the rest split recursively.
+    """
+    if num_groups == 1:
+        return True
+    if not subset_sums(weights) >> target & 1:
+        return False
+    if num_groups == 2:
+        return True
+
+    first, rest = weights[0], weights[1:]
+
+    def _split(i: int, remaining: int, chosen: list[int]) -> bool:
+        if remaining == 0:
+            others = [w for j, w in enumerate(rest) if j not in chosen]
+            return can_split(others, num_groups - 1, target)
+        for j in range(i, len(rest)):
+            # Equal weights would only make the same group again
+            if j > i and rest[j] == rest[j - 1]:
                 continue
+            if rest[j] <= remaining:
+                if _split(j + 1, remaining - rest[j], chosen + [j]):
+                    return True
+        return False
 
-            qe = product(combination)
-            min_qe = min(qe, min_qe)
-            done = True
+    return _split(0, target - first, [])
 
-        # Once we've found the min QE from one r-length combination group then
-        # no group with more elements can possibly have a lower QE, so we can
-        # stop searching
-        if done:
-            break
 
-    return int(min_qe)
+def solve(weights: list[int], num_groups: int) -> int:
+    """
+    Returns the lowest QE of the smallest first groups of packages that leave
+    the rest able to be split into the other groups.
+    For each size of group in turn, the groups are searched by branch and bound
+    over the weights from heaviest to lightest, giving up on a branch when:
+    - even the heaviest weights left can't make up the target, or the lightest
+      are too heavy for it,
+    - or even the lightest weights left would take the QE past the best so far.
+    Only a group with a new best QE has the rest of the packages checked.
+    """
+    total = sum(weights)
+    if total % num_groups:
+        raise ValueError("Packages can't be split evenly")
+    target = total // num_groups
+
+    weights = sorted(weights, reverse=True)
+    n = len(weights)
+
+    # Sums of each run of the heaviest weights, and the sums and QE of the
+    # lightest (by number of them)
+    prefix = list(accumulate(weights, initial=0))
+    lightest_sum = [prefix[n] - prefix[n - r] for r in range(n + 1)]
+    lightest_qe = [product(tuple(weights[n - r:])) for r in range(n + 1)]
+
+    for length in range(1, n + 1):
+        best: Optional[int] = None
+
+        def _search(i: int, r: int, remaining: int, qe: int,
+                    chosen: list[int]) -> None:
+            nonlocal best
+            if r == 0:
+                if remaining == 0 and (best is None or qe < best):
+                    rest = [
+                        w for j, w in enumerate(weights) if j not in chosen]
+                    if can_split(rest, num_groups - 1, target):
+                        best = qe
+                return
+
+            if (
+                n - i < r
+                or prefix[i + r] - prefix[i] < remaining
+                or lightest_sum[r] > remaining
+                or (best is not None and qe * lightest_qe[r] >= best)
+            ):
+                return
+
+            for j in range(i, n - r + 1):
+                if j > i and weights[j] == weights[j - 1]:
+                    continue
+                if weights[j] <= remaining:
+                    _search(j + 1, r - 1, remaining - weights[j],
+                            qe * weights[j], chosen + [j])
+
+        _search(0, length, target, 1, [])
+        if best is not None:
+            # Fewest packages comes first, whatever the QE of bigger groups
+            return best
+
+    raise ValueError("Packages can't be split evenly")
 
 
 def part1(input: str) -> int:
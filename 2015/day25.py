@@ -1,3 +1,4 @@
+from collections.abc import Iterable
 from pathlib import Path
 import re
 from time import time
@@ -6,6 +7,10 @@ YEAR = 2015
 DAY = 25
 NAME = "Let It Snow"
 
+SEED = 20151125
+MULTIPLIER = 252533
+MODULUS = 33554393
+
 
 def parse_input(input: str) -> tuple[int, int]:
     match_row = re.search("row ([0-9]+)", input)
@@ -17,15 +22,67 @@ def parse_input(input: str) -> tuple[int, int]:
     return (row, column)
 
 
-def part1(input: str) -> int:
-    row, column = parse_input(input)
+def code_index(row: int, column: int) -> int:
+    """
+    Returns the position (from 0) of the code at a row and column, counting
+    along the diagonals from the bottom left.
+    """
+    diagonal = row + column - 2
+    return diagonal * (diagonal + 1) // 2 + column - 1
+
+
+def advance(
+        value: int,
+        steps: int,
+        multiplier: int = MULTIPLIER,
+        modulus: int = MODULUS,
+        increment: int = 0
+) -> int:
+    """
+    Returns the value a number of steps on in the linear congruential sequence
+    `x -> (multiplier * x + increment) % modulus`.
+    That's `a^n x + c (a^n - 1) / (a - 1)`, with the powers by modular
+    exponentiation in O(log n). The geometric sum is worked out modulo
+    `modulus * (a - 1)` so the division is exact even when `a - 1` has no
+    inverse modulo `modulus`.
+    """
+    a, c, m = multiplier, increment, modulus
+    if c == 0:
+        return pow(a, steps, m) * value % m
+    if a == 1:
+        return (value + c * steps) % m
+    geometric = (pow(a, steps, m * (a - 1)) - 1) // (a - 1)
+    return (pow(a, steps, m) * value + c * geometric) % m
 
-    n = sum(range(row + column - 1)) + column
 
-    code = 20151125
-    for _ in range(n - 1):
-        code = (code * 252533) % 33554393
+def codes(
+        positions: Iterable[tuple[int, int]],
+        seed: int = SEED,
+        multiplier: int = MULTIPLIER,
+        modulus: int = MODULUS,
+        increment: int = 0
+) -> list[int]:
+    """
+    Returns the codes at many (row, column) positions at once, in the order
+    given. The positions are visited in sequence order, each code advanced
+    from the last one so the exponents are only the gaps between them.
+    """
+    indices = [code_index(row, column) for row, column in positions]
+    results = [0] * len(indices)
 
+    value, index = seed, 0
+    for i in sorted(range(len(indices)), key=indices.__getitem__):
+        value = advance(
+            value, indices[i] - index, multiplier, modulus, increment)
+        index = indices[i]
+        results[i] = value
+
+    return results
+
+
+def part1(input: str) -> int:
+    row, column = parse_input(input)
+    code = advance(SEED, code_index(row, column))
     return code
 
 
@@ -0,0 +1,88 @@
+"""
+Held-Karp bitmask dynamic programming for the shortest and longest routes
+visiting every node of a complete graph, shared by days 9 (open paths) and 13
+(cycles around the table).
+
+This is O(n^2 * 2^n) rather than the O(n!) of trying every permutation, and
+finds both the minimum and the maximum in the same pass. Being pure Python
+(the inner loop is a min/max over a map), it takes seconds up to around 16
+nodes, and each extra node a little over doubles that: 20 nodes takes the
+best part of a minute.
+"""
+from collections.abc import Hashable, Sequence
+from itertools import combinations
+from operator import add
+from typing import TypeVar
+
+INF = float("inf")
+
+Node = TypeVar("Node", bound=Hashable)
+
+
+def distance_matrix(
+        nodes: Sequence[Node],
+        distances: dict[tuple[Node, Node], int]
+) -> list[list[int]]:
+    """
+    Builds an integer-indexed matrix of the distances between every pair of
+    nodes, in the order given (a node to itself is 0).
+    """
+    return [
+        [0 if a == b else distances[(a, b)] for b in nodes]
+        for a in nodes
+    ]
+
+
+def route_extremes(
+        matrix: list[list[int]],
+        cycle: bool
+) -> tuple[int, int]:
+    """
+    Returns the lengths of the shortest and longest routes visiting every node
+    exactly once, either returning to the first node (`cycle`) or not.
+    An open path is solved as a cycle through an extra node at distance 0 from
+    every other, which then stands for the free choice of start and end.
+    Cycles start and end at the last node, with the DP over subsets of the
+    others: `lo[mask][k]` / `hi[mask][k]` are the shortest and longest paths
+    from the start through the nodes in `mask` ending at `k`. Only the previous
+    layer of subsets (by size) is kept.
+    """
+    if not cycle:
+        matrix = [row + [0] for row in matrix] + [[0] * (len(matrix) + 1)]
+
+    n = len(matrix) - 1
+    start = n
+    if n == 0:
+        return 0, 0
+
+    # Columns of distances into each node, from each other (non-start) node
+    into = [[matrix[j][k] for j in range(n)] for k in range(n)]
+
+    lo: dict[int, list[float]] = {}
+    hi: dict[int, list[float]] = {}
+    for k in range(n):
+        lo[1 << k] = [INF] * n
+        hi[1 << k] = [-INF] * n
+        lo[1 << k][k] = hi[1 << k][k] = matrix[start][k]
+
+    for size in range(2, n + 1):
+        next_lo: dict[int, list[float]] = {}
+        next_hi: dict[int, list[float]] = {}
+        for subset in combinations(range(n), size):
+            mask = sum(1 << k for k in subset)
+            row_lo = [INF] * n
+            row_hi = [-INF] * n
+            for k in subset:
+                prev = mask ^ (1 << k)
+                # Nodes outside of the previous subset are at +/-inf, so drop
+                # out of the min/max
+                row_lo[k] = min(map(add, lo[prev], into[k]))
+                row_hi[k] = max(map(add, hi[prev], into[k]))
+            next_lo[mask] = row_lo
+            next_hi[mask] = row_hi
+        lo, hi = next_lo, next_hi
+
+    full = (1 << n) - 1
+    shortest = min(lo[full][k] + matrix[k][start] for k in range(n))
+    longest = max(hi[full][k] + matrix[k][start] for k in range(n))
+    return int(shortest), int(longest)
@@ -0,0 +1,399 @@
+"""
+Shared virtual machine for assembunny, the assembly language of days 12, 23
+and 25.
+
+Programs are decoded to tuples of integers, `(opcode, x, x_is_register, y,
+y_is_register)` with registers as indices, and run over a list of registers
+rather than the closures over a register dictionary used originally.
+
+The loops that assembunny programs use in place of arithmetic are detected and
+run as single fused operations:
+
+    inc a           cpy b c
+    dec b           inc a
+    jnz b -2        dec c
+                    jnz c -2
+                    dec d
+                    jnz d -5
+
+    a += b, b = 0   a += b * d, c = 0, d = 0
+
+Fused operations are keyed by the address of the first instruction of the
+loop, so jumping into the middle of a loop still runs it instruction by
+instruction, and they're detected again around any instruction changed by
+`tgl`.
+
+Programs can also be compiled to Python, one function per basic block with the
+registers held in local variables, compiled lazily as each block is first
+entered. `tgl` only invalidates the blocks that depend on the instruction it
+changes, which are recompiled when next entered.
+"""
+from collections.abc import Callable, Iterator
+from typing import Optional
+
+REGISTERS = "abcd"
+
+CPY, INC, DEC, JNZ, TGL, OUT = range(6)
+OPCODES = {"cpy": CPY, "inc": INC, "dec": DEC, "jnz": JNZ, "tgl": TGL,
+           "out": OUT}
+
+ADD, MUL = range(2)
+
+# Lengths of the fused loops, i.e. how far back a change to an instruction can
+# affect them
+ADD_LENGTH = 3
+MUL_LENGTH = 6
+
+Instruction = tuple[int, int, int, int, int]
+Fused = tuple[int, ...]
+
+# Blocks take and return the registers, along with the address to continue
+# from and an event (an `OUT` or `TGL` for the dispatcher to handle, or -1)
+# with its argument
+Block = Callable[
+    [int, int, int, int], tuple[int, int, int, int, int, int, int]
+]
+
+
+def decode_operand(operand: str) -> tuple[int, int]:
+    if operand in REGISTERS:
+        return REGISTERS.index(operand), 1
+    return int(operand), 0
+
+
+def parse(input: str) -> list[Instruction]:
+    program: list[Instruction] = []
+
+    for line in input.strip().split("\n"):
+        op, *operands = line.split()
+        if op not in OPCODES:
+            raise RuntimeError(f"Unhandled instruction '{op}'")
+        x, x_reg = decode_operand(operands[0])
+        y, y_reg = decode_operand(operands[1]) if len(operands) > 1 else (0, 0)
+        program.append((OPCODES[op], x, x_reg, y, y_reg))
+
+    return program
+
+
+def toggle(instruction: Instruction) -> Instruction:
+    """
+    Returns the instruction as changed by `tgl` (see day 23).
+    """
+    op, x, x_reg, y, y_reg = instruction
+    if op in (INC, DEC, TGL, OUT):
+        return (DEC if op == INC else INC, x, x_reg, y, y_reg)
+    return (CPY if op == JNZ else JNZ, x, x_reg, y, y_reg)
+
+
+def match_add(program: list[Instruction], ip: int) -> Optional[Fused]:
+    """
+    Matches `inc/dec dst; dec counter; jnz counter -2` (in either order of the
+    first two instructions) at the given address.
+    """
+    if ip + ADD_LENGTH > len(program):
+        return None
+
+    (op1, x1, r1, _, _), (op2, x2, r2, _, _), (op3, x3, r3, y3, ry3) = \
+        program[ip:ip + ADD_LENGTH]
+    if op3 != JNZ or not r3 or ry3 or y3 != -2 or not (r1 and r2):
+        return None
+
+    for (op_dst, dst), (op_counter, counter) in (
+        ((op1, x1), (op2, x2)),
+        ((op2, x2), (op1, x1)),
+    ):
+        if (
+            op_counter == DEC
+            and counter == x3
+            and op_dst in (INC, DEC)
+            and dst != counter
+        ):
+            return (ADD, dst, 1 if op_dst == INC else -1, counter)
+
+    return None
+
+
+def match_mul(program: list[Instruction], ip: int) -> Optional[Fused]:
+    """
+    Matches `cpy src counter; <add loop into dst over counter>; dec outer;
+    jnz outer -5` at the given address.
+    """
+    if ip + MUL_LENGTH > len(program):
+        return None
+
+    op1, src, src_reg, counter, counter_reg = program[ip]
+    add = match_add(program, ip + 1)
+    op5, outer, outer_reg, _, _ = program[ip + 4]
+    op6, x6, r6, y6, ry6 = program[ip + 5]
+
+    if (
+        op1 != CPY or not counter_reg or add is None or add[3] != counter
+        or op5 != DEC or not outer_reg
+        or op6 != JNZ or not r6 or x6 != outer or ry6 or y6 != -5
+    ):
+        return None
+
+    _, dst, sign, _ = add
+    if (
+        len({dst, counter, outer}) != 3
+        or (src_reg and src in (dst, counter, outer))
+    ):
+        return None
+
+    return (MUL, dst, sign, src, src_reg, counter, outer)
+
+
+def fuse(program: list[Instruction], ip: int) -> Optional[Fused]:
+    return match_mul(program, ip) or match_add(program, ip)
+
+
+class Machine:
+    """
+    Runs an assembunny program over registers `a` to `d`. The program is
+    copied, as `tgl` modifies it.
+    """
+    def __init__(
+            self,
+            program: list[Instruction],
+            registers: dict[str, int]
+    ) -> None:
+        self.program = list(program)
+        self.fused = [fuse(self.program, ip) for ip in range(len(program))]
+        self.registers = [registers.get(r, 0) for r in REGISTERS]
+        self.ip = 0
+
+    def __getitem__(self, register: str) -> int:
+        return self.registers[REGISTERS.index(register)]
+
+    def toggle(self, target: int) -> None:
+        if 0 <= target < len(self.program):
+            self.program[target] = toggle(self.program[target])
+            # Any fused loop covering the target may have been broken (or one
+            # may now have been formed)
+            for ip in range(max(0, target - MUL_LENGTH + 1), target + 1):
+                self.fused[ip] = fuse(self.program, ip)
+
+    def run(self) -> Iterator[int]:
+        """
+        Runs the program until it halts, yielding the value of each `out`.
+        The instruction pointer and registers are up to date whenever a value
+        is yielded, so the caller can stop (or snapshot the machine) there.
+        """
+        program, fused, r = self.program, self.fused, self.registers
+        ip = self.ip
+
+        while 0 <= ip < len(program):
+            f = fused[ip]
+            if f is not None:
+                if f[0] == ADD:
+                    _, dst, sign, counter = f
+                    # A non-positive counter would never reach zero, so leave
+                    # that to the instructions themselves
+                    if r[counter] > 0:
+                        r[dst] += sign * r[counter]
+                        r[counter] = 0
+                        ip += ADD_LENGTH
+                        continue
+                else:
+                    _, dst, sign, src, src_reg, counter, outer = f
+                    value = r[src] if src_reg else src
+                    if value > 0 and r[outer] > 0:
+                        r[dst] += sign * value * r[outer]
+                        r[counter] = 0
+                        r[outer] = 0
+                        ip += MUL_LENGTH
+                        continue
+
+            op, x, x_reg, y, y_reg = program[ip]
+            # Instructions made invalid by tgl (e.g. `cpy 1 2`) are skipped
+            if op == CPY:
+                if y_reg:
+                    r[y] = r[x] if x_reg else x
+            elif op == INC:
+                if x_reg:
+                    r[x] += 1
+            elif op == DEC:
+                if x_reg:
+                    r[x] -= 1
+            elif op == JNZ:
+                if (r[x] if x_reg else x) != 0:
+                    ip += r[y] if y_reg else y
+                    continue
+            elif op == TGL:
+                self.toggle(ip + (r[x] if x_reg else x))
+            elif op == OUT:
+                self.ip = ip + 1
+                yield r[x] if x_reg else x
+            ip += 1
+
+        self.ip = ip
+
+
+def run(program: list[Instruction], registers: dict[str, int]) -> Machine:
+    """
+    Runs a program to completion, ignoring any output.
+    """
+    machine = Machine(program, registers)
+    for _ in machine.run():
+        pass
+    return machine
+
+
+def operand_source(value: int, is_register: int) -> str:
+    return REGISTERS[value] if is_register else str(value)
+
+
+def block_source(
+        program: list[Instruction],
+        start: int
+) -> tuple[str, int]:
+    """
+    Generates the source of a function running the block of straight-line code
+    starting at the given address, up to and including the next jump, `tgl` or
+    `out` (fused loops, whose jumps stay within the loop, don't end a block).
+    Returns the source along with the address of the last instruction.
+    Fused loops whose counters would never reach zero raise an error, rather
+    than looping forever.
+    """
+    body: list[str] = []
+    registers = ", ".join(REGISTERS)
+    loops = False
+
+    def exit(ip: int | str, event: int = -1, arg: str = "0") -> str:
+        return f"return ({ip}, {registers}, {event}, {arg})"
+
+    ip = start
+    while ip < len(program):
+        f = fuse(program, ip)
+        if f is not None and f[0] == ADD:
+            _, dst, sign, counter = f
+            d, n = REGISTERS[dst], REGISTERS[counter]
+            body += [
+                f"if {n} <= 0:",
+                f"    raise RuntimeError('Infinite loop at {ip}')",
+                f"{d} {'+' if sign > 0 else '-'}= {n}",
+                f"{n} = 0",
+            ]
+            ip += ADD_LENGTH
+            continue
+        if f is not None:
+            _, dst, sign, src, src_reg, counter, outer = f
+            d, n, o = REGISTERS[dst], REGISTERS[counter], REGISTERS[outer]
+            v = operand_source(src, src_reg)
+            body += [
+                f"if {v} <= 0 or {o} <= 0:",
+                f"    raise RuntimeError('Infinite loop at {ip}')",
+                f"{d} {'+' if sign > 0 else '-'}= {v} * {o}",
+                f"{n} = 0",
+                f"{o} = 0",
+            ]
+            ip += MUL_LENGTH
+            continue
+
+        op, x, x_reg, y, y_reg = program[ip]
+        vx, vy = operand_source(x, x_reg), operand_source(y, y_reg)
+        # Instructions made invalid by tgl (e.g. `cpy 1 2`) are skipped
+        if op == CPY:
+            if y_reg:
+                body.append(f"{vy} = {vx}")
+        elif op == INC:
+            if x_reg:
+                body.append(f"{vx} += 1")
+        elif op == DEC:
+            if x_reg:
+                body.append(f"{vx} -= 1")
+        elif op == JNZ:
+            target = f"{ip} + {vy}" if y_reg else str(ip + y)
+            # Jumps back to the start of the block loop within the function
+            jump = "continue" if target == str(start) else exit(target)
+            loops = loops or jump == "continue"
+            if x_reg:
+                body += [f"if {vx} != 0:", f"    {jump}", exit(ip + 1)]
+            else:
+                body.append(jump if x != 0 else exit(ip + 1))
+            break
+        elif op == TGL:
+            body.append(exit(ip + 1, TGL, f"{ip} + {vx}"))
+            break
+        elif op == OUT:
+            body.append(exit(ip + 1, OUT, vx))
+            break
+        ip += 1
+    else:
+        body.append(exit(ip))
+        ip -= 1
+
+    if loops:
+        body = ["while True:"] + [f"    {line}" for line in body]
+
+    source = "\n".join(
+        [f"def block({registers}):"] + [f"    {line}" for line in body]
+    )
+    return source, ip
+
+
+class Compiled:
+    """
+    An assembunny program compiled to Python functions, one for each block
+    starting at an address that has been run, compiled as it's first entered.
+    A compiled program can be run any number of times (e.g. with different
+    initial registers) as long as it isn't modified by `tgl`, so programs
+    using `tgl` need a fresh instance for each run.
+    """
+    def __init__(self, program: list[Instruction]) -> None:
+        self.program = list(program)
+        self.blocks: list[Optional[Block]] = [None] * len(program)
+        # Last address each compiled block depends on, by its start address
+        self.extents: dict[int, int] = {}
+
+    def block(self, ip: int) -> Block:
+        block = self.blocks[ip]
+        if block is None:
+            source, end = block_source(self.program, ip)
+            namespace: dict[str, Block] = {}
+            exec(compile(source, f"<assembunny block {ip}>", "exec"),
+                 namespace)
+            block = self.blocks[ip] = namespace["block"]
+            # Detecting fused loops looks ahead of the last instruction
+            self.extents[ip] = end + MUL_LENGTH - 1
+        return block
+
+    def toggle(self, target: int) -> None:
+        if 0 <= target < len(self.program):
+            self.program[target] = toggle(self.program[target])
+            for start, extent in list(self.extents.items()):
+                if start <= target <= extent:
+                    self.blocks[start] = None
+                    del self.extents[start]
+
+
+class CompiledMachine:
+    """
+    Runs a compiled assembunny program, as `Machine` does for interpretation.
+    """
+    def __init__(self, compiled: Compiled, registers: dict[str, int]) -> None:
+        self.compiled = compiled
+        self.registers = [registers.get(r, 0) for r in REGISTERS]
+        self.ip = 0
+
+    def __getitem__(self, register: str) -> int:
+        return self.registers[REGISTERS.index(register)]
+
+    def run(self) -> Iterator[int]:
+        compiled = self.compiled
+        blocks = compiled.blocks
+        a, b, c, d = self.registers
+        ip = self.ip
+
+        while 0 <= ip < len(blocks):
+            block = blocks[ip] or compiled.block(ip)
+            ip, a, b, c, d, event, arg = block(a, b, c, d)
+            if event == OUT:
+                self.ip = ip
+                self.registers = [a, b, c, d]
+                yield arg
+            elif event == TGL:
+                compiled.toggle(arg)
+
+        self.ip = ip
+        self.registers = [a, b, c, d]
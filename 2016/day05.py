@@ -1,8 +1,11 @@
-from hashlib import md5
 from pathlib import Path
+import sys
 from time import time
 from typing import Optional
 
+sys.path.append(str(Path(__file__).parent.parent))
+from md5search import find  # noqa: E402
+
 YEAR = 2016
 DAY = 5
 NAME = "How About a Nice Game of Chess?"
@@ -15,14 +18,8 @@ def part1(input: str) -> str:
 
     door_id = input.strip()
 
-    n = -1  # First iteration will be 0
-    while True:
-        n += 1
-
-        h = md5(f"{door_id}{n}".encode("utf-8"))
-        digest = h.hexdigest()
-        if digest[:5] == "00000":
-            password += digest[5]
+    for _, digest in find(door_id, 5):
+        password += digest[5]
 
         if len(password) == 8:
             break
@@ -35,27 +32,20 @@ def part2(input: str) -> str:
 
     door_id = input.strip()
 
-    n = -1  # First iteration will be 0
-    while True:
-        n += 1
-
-        h = md5(f"{door_id}{n}".encode("utf-8"))
-        digest = h.hexdigest()
+    for _, digest in find(door_id, 5):
+        pos, char = digest[5], digest[6]
 
-        if digest[:5] == "00000":
-            pos, char = digest[5], digest[6]
+        if pos not in VALID_POSITIONS:
+            continue
 
-            if pos not in VALID_POSITIONS:
-                continue
+        # Use only the first character found for any given position
+        if values[int(pos)] is not None:
+            continue
 
-            # Use only the first character found for any given position
-            if values[int(pos)] is not None:
-                continue
+        values[int(pos)] = char
 
-            values[int(pos)] = char
-
-            if all(values):
-                break
+        if all(values):
+            break
 
     password = "".join([v for v in values if v is not None])
     return password
@@ -1,71 +1,16 @@
-from collections.abc import Callable
 from pathlib import Path
 from time import time
 
+from assembunny import parse, run
+
 YEAR = 2016
 DAY = 12
 NAME = "Leonardo's Monorail"
 
 
-def make_cpy(opl: int | str, opr: str) -> Callable[[dict[str, int]], int]:
-    def eval(registers: dict) -> int:
-        value = registers[opl] if opl in registers else int(opl)
-        registers[opr] = value
-        return 1
-    return eval
-
-
-def make_inc(operand: str) -> Callable[[dict[str, int]], int]:
-    def eval(registers: dict) -> int:
-        registers[operand] += 1
-        return 1
-    return eval
-
-
-def make_dec(operand: str) -> Callable[[dict[str, int]], int]:
-    def eval(registers: dict) -> int:
-        registers[operand] -= 1
-        return 1
-    return eval
-
-
-def make_jnz(opl: int | str, opr: int) -> Callable[[dict[str, int]], int]:
-    def eval(registers: dict) -> int:
-        value = registers[opl] if opl in registers else int(opl)
-        return opr if value != 0 else 1
-    return eval
-
-
-def parse_input(input: str) -> list[Callable[[dict[str, int]], int]]:
-    """
-    Unnecessary closure-based solution to instruction evaluation.
-    """
-    instructions: list[Callable[[dict[str, int]], int]] = []
-
-    for line in input.strip().split("\n"):
-        parts = line.split()
-        if parts[0] == "cpy":
-            instruction = make_cpy(parts[1], parts[2])
-        elif parts[0] == "inc":
-            instruction = make_inc(parts[1])
-        elif parts[0] == "dec":
-            instruction = make_dec(parts[1])
-        elif parts[0] == "jnz":
-            instruction = make_jnz(parts[1], int(parts[2]))
-        instructions.append(instruction)
-
-    return instructions
-
-
 def solve(input: str, registers: dict[str, int]) -> int:
-    instructions = parse_input(input)
-
-    ip = 0
-    while ip < len(instructions):
-        instruction = instructions[ip]
-        ip += instruction(registers)
-
-    result = registers["a"]
+    machine = run(parse(input), registers)
+    result = machine["a"]
     return result
 
 
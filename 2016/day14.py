@@ -1,89 +1,121 @@
-from dataclasses import dataclass
+from collections import Counter, deque
+from collections.abc import Iterator
 from hashlib import md5
+from itertools import count, islice
 from pathlib import Path
 import re
+import sys
 from time import time
+from typing import Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+from parallel import ordered_map  # noqa: E402
 
 YEAR = 2016
 DAY = 14
 NAME = "One-Time Pad"
 
 TRIPLE_PATTERN = re.compile(r"(.)(\1){2}")
+QUINTUPLE_PATTERN = re.compile(r"(.)(\1){4}")
 
+LOOKAHEAD = 1000
 
-@dataclass
-class CandidateKey:
-    index: int
-    pattern: str
-    max_index: int
-
+# Digest features for an index, the character of the first triple (if any)
+# and the characters of any quintuples
+Features = tuple[str, str]
 
-def solve(salt: str, key_count: int, stretches: int) -> int:
-    candidates: list[CandidateKey] = []
-    eligible_keys: list[int] = []
 
-    done = False
-    i = 0
-    while True:
-        h = md5(f"{salt}{i}".encode("utf-8"))
-        digest = h.hexdigest()
+def hash_block(
+        salt: str,
+        start: int,
+        size: int,
+        stretches: int
+) -> list[Features]:
+    """
+    Computes the (stretched) digests for a block of indices, returning only
+    the features of each that are needed to find keys.
+    """
+    features = []
 
+    for i in range(start, start + size):
+        digest = md5(f"{salt}{i}".encode("utf-8")).hexdigest()
         for _ in range(stretches):
-            h = md5(digest.encode("utf-8"))
-            digest = h.hexdigest()
+            digest = md5(digest.encode("utf-8")).hexdigest()
 
         match = TRIPLE_PATTERN.search(digest)
-
-        # Compare current digest against all candidates
-        # XXX: Must do this in key ascending order, because earlier candidate
-        # keys can be made eligible later (for example key 1 is made eligible
-        # after the next 200 while key 2 is made available after the next 100),
-        # in which case while key 2 was the first to be made eligible key 1 is
-        # still considered as earlier, which affects us when we're looking for
-        # the Nth key in order.
-        # XXX: We mark deletions for a second pass instead of doing deletions
-        # during the iteration, as these would need to either be done in
-        # reverse order, flagged/tombstoned, or stored with a different
-        # structure such as a heap, and we can get away without any of that for
-        # this simple case by just doing deletions in a second pass.
-        candidate_indices_to_delete: set[int] = set()
-
-        for candidate in candidates:
-            if candidate.pattern in digest and i <= candidate.max_index:
-                eligible_keys.append(candidate.index)
-                candidate_indices_to_delete.add(candidate.index)
-
-            # Don't wait to check all the candidate keys once we hit the target
-            if len(eligible_keys) == key_count:
-                done = True
-                break
-
-        if done:
-            break
-
-        # Candidate key expiry (see above for reason we don't delete in-loop)
-        for cidx in range(len(candidates)-1, -1, -1):
-            candidate = candidates[cidx]
-            if (i > candidate.max_index
-                    or candidate.index in candidate_indices_to_delete):
-                del candidates[cidx]
-
-        # Is the current key a candidate?
-        if match is not None:
-            c = match.group(0)[0]
-
-            candidate = CandidateKey(index=i, pattern=c*5, max_index=i+1000)
-            candidates.append(candidate)
-
-        i += 1
-
-    result_index = eligible_keys[-1]
-    return result_index
+        if match is None:
+            # No triples means no quintuples either
+            features.append(("", ""))
+            continue
+
+        quintuples = {m.group(1) for m in QUINTUPLE_PATTERN.finditer(digest)}
+        features.append((match.group(1), "".join(quintuples)))
+
+    return features
+
+
+def hash_features(
+        salt: str,
+        stretches: int,
+        workers: Optional[int],
+        block_size: int = 256
+) -> Iterator[Features]:
+    """
+    Yields the digest features of every index in order. With more than one
+    worker, blocks of indices are hashed ahead of the consumer across a pool of
+    processes.
+    """
+    blocks = ordered_map(
+        hash_block,
+        ((salt, start, block_size, stretches)
+         for start in count(0, block_size)),
+        workers)
+    for block in blocks:
+        yield from block
+
+
+def solve(
+        salt: str,
+        key_count: int,
+        stretches: int,
+        workers: Optional[int] = None
+) -> int:
+    """
+    Checks each index in order for being a key, keeping the features of the
+    next 1000 digests in a window along with a count of the digests in it with
+    a quintuple of each character. Confirming a candidate is then a lookup of
+    the count for its triple character, rather than a scan of the window.
+    Checking in index order also means the Nth key found is the Nth key by
+    index, so there's no need to track candidates awaiting confirmation.
+    """
+    features = hash_features(salt, stretches, workers)
+
+    # Features of the current index and the lookahead window after it
+    window = deque(islice(features, LOOKAHEAD + 1))
+    quintuple_counts: Counter[str] = Counter()
+    for _, quintuples in islice(window, 1, None):
+        quintuple_counts.update(quintuples)
+
+    keys = 0
+    for i in count():
+        triple, _ = window.popleft()
+        if triple and quintuple_counts[triple] > 0:
+            keys += 1
+            if keys == key_count:
+                return i
+
+        # Slide the window along to the next index
+        quintuple_counts.subtract(window[0][1])
+        window.append(next(features))
+        quintuple_counts.update(window[-1][1])
+
+    raise RuntimeError("Unreachable")
 
 
 def part1(input: str) -> int:
     salt = input.strip()
-    result = solve(salt, 64, 0)
+    # Unstretched hashes are too cheap to be worth handing to other processes
+    result = solve(salt, 64, 0, workers=1)
     return result
 
 
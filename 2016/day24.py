@@ -9,6 +9,8 @@ YEAR = 2016
 DAY = 24
 NAME = "Air Duct Spelunking"
 
+CACHEABLE = ("build_adjacencies_with_distances",)
+
 
 @dataclass(frozen=True)
 class DistanceValue:
@@ -94,9 +96,11 @@ def find_distances(
 
 
 def build_adjacencies_with_distances(
-        grid: list[list[str]],
-        points_of_interest: dict[int, tuple[int, int]]
+        input: str
         ) -> dict[int, list[DistanceValue]]:
+    grid = make_grid(input)
+    points_of_interest = find_points_of_interest(grid)
+
     adjacencies: dict[int, list[DistanceValue]] = defaultdict(list)
 
     for n, point in points_of_interest.items():
@@ -126,9 +130,7 @@ def solve(input: str, return_to_beginning: bool) -> int:
     each point, allowing for backtracking through previously-visited points
     4. Try all the paths!
     """
-    grid = make_grid(input)
-    points_of_interest = find_points_of_interest(grid)
-    adjacencies = build_adjacencies_with_distances(grid, points_of_interest)
+    adjacencies = build_adjacencies_with_distances(input)
     distances = build_distance_pairs(adjacencies)
 
     min_distance = sys.maxsize
@@ -1,117 +1,96 @@
-from collections.abc import Callable
+from itertools import count
 from pathlib import Path
+import sys
 from time import time
+from typing import Optional
+
+from assembunny import Compiled, CompiledMachine, parse
+
+sys.path.append(str(Path(__file__).parent.parent))
+from parallel import ordered_map  # noqa: E402
 
 YEAR = 2016
 DAY = 25
 NAME = "Clock Signal"
 
-Instruction = Callable[[dict[str, int], list[int]], int]
-
-
-def make_cpy(opl: int | str, opr: str) -> Instruction:
-    def eval(registers: dict, output: list[int]) -> int:
-        value = registers[opl] if opl in registers else int(opl)
-        registers[opr] = value
-        return 1
-    return eval
 
+# Shared by the searches in each worker process, see init_worker()
+compiled: Optional[Compiled] = None
 
-def make_inc(operand: str) -> Instruction:
-    def eval(registers: dict, output: list[int]) -> int:
-        registers[operand] += 1
-        return 1
-    return eval
 
+def is_clock_signal(program: Compiled, a: int, max_outputs: int) -> bool:
+    """
+    Checks whether the program outputs 0, 1, 0, 1, ... forever for the given
+    initial value of a.
+    Rather than checking some fixed number of outputs, the state of the machine
+    (instruction pointer and registers) is recorded after each output. As the
+    machine is deterministic, once a state repeats (at the same point in the
+    0, 1 cycle) every output after it repeats too, so the signal is proven
+    periodic. Raises if the given number of outputs pass without a repeat, as
+    the signal could still turn out to be a clock signal after that.
+    """
+    machine = CompiledMachine(program, dict(a=a, b=0, c=0, d=0))
+    seen: set[tuple[int, ...]] = set()
 
-def make_dec(operand: str) -> Instruction:
-    def eval(registers: dict, output: list[int]) -> int:
-        registers[operand] -= 1
-        return 1
-    return eval
-
+    for i, value in enumerate(machine.run()):
+        if value != i % 2:
+            return False
+        state = (machine.ip, i % 2, *machine.registers)
+        if state in seen:
+            return True
+        if i == max_outputs:
+            raise RuntimeError(
+                f"No repeated state within {max_outputs} outputs for a={a}")
+        seen.add(state)
 
-def make_jnz(opl: int | str, opr: int) -> Instruction:
-    def eval(registers: dict, output: list[int]) -> int:
-        value = registers[opl] if opl in registers else int(opl)
-        return opr if value != 0 else 1
-    return eval
+    # The program halted
+    return False
 
 
-def make_out(operand: str) -> Instruction:
-    def eval(registers: dict, output: list[int]) -> int:
-        value = registers[operand]
-        output.append(value)
-        return 1
-    return eval
+def init_worker(input: str) -> None:
+    global compiled
+    compiled = Compiled(parse(input))
 
 
-def parse_input(input: str) -> list[Instruction]:
+def search_chunk(start: int, size: int, max_outputs: int) -> Optional[int]:
     """
-    Unnecessary closure-based solution to instruction evaluation.
+    Returns the smallest value of a in the given range that produces the clock
+    signal, if any.
     """
-    instructions: list[Instruction] = []
-
-    for line in input.strip().split("\n"):
-        parts = line.split()
-        if parts[0] == "cpy":
-            instruction = make_cpy(parts[1], parts[2])
-        elif parts[0] == "inc":
-            instruction = make_inc(parts[1])
-        elif parts[0] == "dec":
-            instruction = make_dec(parts[1])
-        elif parts[0] == "jnz":
-            instruction = make_jnz(parts[1], int(parts[2]))
-        elif parts[0] == "out":
-            instruction = make_out(parts[1])
-        else:
-            raise RuntimeError(f"Unhandled instruction '{parts[0]}'")
-
-        instructions.append(instruction)
-
-    return instructions
-
-
-def run_until_n_outputs(
-        instructions: list[Instruction],
-        registers: dict[str, int],
-        num_outputs: int
-        ) -> list[int]:
-    output: list[int] = []
-
-    ip = 0
-    while ip < len(instructions):
-        instruction = instructions[ip]
-        ip += instruction(registers, output)
-        if len(output) == num_outputs:
-            break
-
-    return output
-
-
-def part1(input: str) -> int:
+    assert compiled is not None
+    for a in range(start, start + size):
+        if is_clock_signal(compiled, a, max_outputs):
+            return a
+    return None
+
+
+def part1(
+        input: str,
+        workers: Optional[int] = None,
+        chunk_size: int = 64,
+        max_outputs: int = 10000
+) -> int:
     """
-    Simplest approach, let's just test incrementing values of a and check the
-    outputs for a periodic signal, running the program until we have N outputs.
+    Tests increasing values of a for the clock signal, in chunks spread across
+    a pool of processes, each of which compiles the program once and reuses it
+    for every value of a it tests.
+    Chunks are submitted in order with a bounded number in flight. A chunk with
+    a match only gives the answer once every chunk before it has come back
+    empty, at which point the remaining chunks are cancelled.
     """
-    instructions = parse_input(input)
-
-    # Minimum required size to find the periodic signal for our input (found by
-    # manual testing and saved here).
-    # NOTE: The puzzle description lists 10 integers as its example which might
-    # be a hint but might not. It seems like we can get away with fewer though.
-    num_outputs = 8
-
-    n = 0
-    while True:
-        registers = dict(a=n, b=0, c=0, d=0)
-        result = run_until_n_outputs(instructions, registers, num_outputs)
-        expected = [0, 1] * (num_outputs // 2)
-        if result == expected:
-            break
-        n += 1
-
-    return n
+    chunks = ordered_map(
+        search_chunk,
+        ((start, chunk_size, max_outputs)
+         for start in count(0, chunk_size)),
+        workers,
+        initializer=init_worker,
+        initargs=(input,))
+    # Results are only taken in order, so the first match is the smallest
+    for result in chunks:
+        if result is not None:
+            return result
+
+    raise RuntimeError("Unreachable")
 
 
 def main() -> None:
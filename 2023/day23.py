@@ -7,6 +7,8 @@ YEAR = 2023
 DAY = 23
 NAME = "A Long Walk"
 
+CACHEABLE = ("build_graph",)
+
 
 @dataclass(frozen=True)
 class Point:
@@ -205,22 +207,43 @@ def find_edges(grid: dict[Point, str],
                 graph.add_edge(edge)
 
 
-def build_graph(grid: dict[Point, str],
-                x_max: int,
-                y_max: int,
-                valid_up: set[str],
-                valid_down: set[str],
-                valid_left: set[str],
-                valid_right: set[str]) -> Graph:
+def build_graph(input: str, climb_slopes: bool) -> tuple[Graph, Node, Node]:
     """
-    Build graph structure (nodes and edges) from map.
+    Build graph structure (nodes and edges) from map, returning it along with
+    the start and end nodes. Moving up slopes is only allowed with
+    `climb_slopes` (part 2).
     """
+    grid = {}
+
+    for y, line in enumerate(input.strip().split("\n")):
+        for x, char in enumerate(line):
+            grid[Point(x, y)] = char
+
+    x_max, y_max = x, y
+
+    # Set of tiles that are allowed for movement in each direction
+    if climb_slopes:
+        # NOTE: An alternative approach would be to rewrite the map when parsed
+        valid_up = {".", "^", "v", "<", ">"}
+        valid_down = {".", "^", "v", "<", ">"}
+        valid_left = {".", "^", "v", "<", ">"}
+        valid_right = {".", "^", "v", "<", ">"}
+    else:
+        valid_up = {".", "^"}
+        valid_down = {".", "v"}
+        valid_left = {".", "<"}
+        valid_right = {".", ">"}
+
     graph = Graph()
 
     find_nodes(grid, x_max, y_max, graph)
     find_edges(grid, graph, valid_up, valid_down, valid_left, valid_right)
 
-    return graph
+    start_p, end_p = find_start_and_end_points(grid)
+    start = graph.points_to_nodes[start_p]
+    end = graph.points_to_nodes[end_p]
+
+    return graph, start, end
 
 
 def find_paths(graph: Graph, src: Node, dst: Node) -> list[int]:
@@ -267,26 +290,7 @@ def prune_graph(graph: Graph, start: Node, end: Node) -> None:
 
 
 def part1(input: str) -> int:
-    grid = {}
-
-    for y, line in enumerate(input.strip().split("\n")):
-        for x, char in enumerate(line):
-            grid[Point(x, y)] = char
-
-    x_max, y_max = x, y
-
-    # Set of tiles that are allowed for movement in each direction
-    valid_up = {".", "^"}
-    valid_down = {".", "v"}
-    valid_left = {".", "<"}
-    valid_right = {".", ">"}
-
-    graph = build_graph(
-        grid, x_max, y_max, valid_up, valid_down, valid_left, valid_right)
-
-    start_p, end_p = find_start_and_end_points(grid)
-    start = graph.points_to_nodes[start_p]
-    end = graph.points_to_nodes[end_p]
+    graph, start, end = build_graph(input, climb_slopes=False)
 
     prune_graph(graph, start, end)
 
@@ -297,28 +301,8 @@ def part1(input: str) -> int:
 
 
 def part2(input: str) -> int:
-    grid = {}
-
-    for y, line in enumerate(input.strip().split("\n")):
-        for x, char in enumerate(line):
-            grid[Point(x, y)] = char
-
-    x_max, y_max = x, y
-
-    # Set of tiles that are allowed for movement in each direction
     # Part 2 essentially allows movement up slopes
-    # NOTE: An alternative approach would be to rewrite the map when parsed
-    valid_up = {".", "^", "v", "<", ">"}
-    valid_down = {".", "^", "v", "<", ">"}
-    valid_left = {".", "^", "v", "<", ">"}
-    valid_right = {".", "^", "v", "<", ">"}
-
-    graph = build_graph(
-        grid, x_max, y_max, valid_up, valid_down, valid_left, valid_right)
-
-    start_p, end_p = find_start_and_end_points(grid)
-    start = graph.points_to_nodes[start_p]
-    end = graph.points_to_nodes[end_p]
+    graph, start, end = build_graph(input, climb_slopes=True)
 
     prune_graph(graph, start, end)
 
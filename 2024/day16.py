@@ -9,6 +9,8 @@ YEAR = 2024
 DAY = 16
 NAME = "Reindeer Maze"
 
+CACHEABLE = ("build_graph",)
+
 
 @dataclass(eq=True, frozen=True, order=True)
 class Vec2i:
@@ -74,15 +76,26 @@ def to_next_node(
 
 
 def build_graph(
-    M: dict[Vec2i, str],
-    start_pos: Vec2i,
-    start_dir: Vec2i,
-    end_pos: Vec2i
+    input: str
 ) -> tuple[Node, Node, set[Node], dict[Node, set[Node]]]:
     """
-    Create graph from the given map, returning the start node, end node,
-    node set and node adjacency map.
+    Create graph from the map in the input, starting out facing east, returning
+    the start node, end node, node set and node adjacency map.
     """
+    M: dict[Vec2i, str] = dict()
+
+    for y, line in enumerate(input.strip().split("\n")):
+        for x, m in enumerate(line):
+            M[Vec2i(x, y)] = m
+            if m == "S":
+                start_pos = Vec2i(x, y)
+            elif m == "E":
+                end_pos = Vec2i(x, y)
+
+    assert start_pos is not None
+    assert end_pos is not None
+
+    start_dir = Vec2i(1, 0)
     start = Node(start_pos, start_pos, start_dir, 0)
     end: Optional[Node] = None
     nodes: set[Node] = set()
@@ -220,45 +233,17 @@ def find_walked_steps_on_best_paths(
 
 
 def part1(input: str) -> int:
-    M: dict[Vec2i, str] = dict()
+    start, end, nodes, adjacencies = build_graph(input)
 
-    for y, line in enumerate(input.strip().split("\n")):
-        for x, m in enumerate(line):
-            M[Vec2i(x, y)] = m
-            if m == "S":
-                start_pos = Vec2i(x, y)
-            elif m == "E":
-                end_pos = Vec2i(x, y)
-
-    assert start_pos is not None
-    assert end_pos is not None
-
-    start, _, nodes, adjacencies = \
-        build_graph(M, start_pos, Vec2i(1, 0), end_pos)
-
-    shortest, _ = shortest_path_and_parents(start, nodes, end_pos, adjacencies)
+    shortest, _ = shortest_path_and_parents(start, nodes, end.pos, adjacencies)
     return shortest
 
 
 def part2(input: str) -> int:
-    M: dict[Vec2i, str] = dict()
-
-    for y, line in enumerate(input.strip().split("\n")):
-        for x, m in enumerate(line):
-            M[Vec2i(x, y)] = m
-            if m == "S":
-                start_pos = Vec2i(x, y)
-            elif m == "E":
-                end_pos = Vec2i(x, y)
-
-    assert start_pos is not None
-    assert end_pos is not None
-
-    start, end, nodes, adjacencies = \
-        build_graph(M, start_pos, Vec2i(1, 0), end_pos)
+    start, end, nodes, adjacencies = build_graph(input)
 
     shortest, parents = \
-        shortest_path_and_parents(start, nodes, end_pos, adjacencies)
+        shortest_path_and_parents(start, nodes, end.pos, adjacencies)
 
     walked_positions = find_walked_steps_on_best_paths(end, parents, shortest)
     return len(walked_positions)
@@ -0,0 +1,80 @@
+"""
+Search for MD5 hashes of a constant prefix followed by an increasing integer
+nonce with some number of leading zero hex digits, as used by 2015 day 4 and
+2016 day 5.
+
+The prefix is hashed once and its state copied for each nonce, rather than
+hashing the whole key every time, and the leading zeros are checked with a
+single comparison of the raw digest bytes against the smallest digest with too
+few zeros, rather than formatting a hex digest for every nonce.
+
+Contiguous ranges of nonces are searched across a pool of processes (see
+`parallel.ordered_map`), with the matches merged back in nonce order so that
+taking the first N matches gives the same result as a serial search.
+"""
+from collections.abc import Iterator
+from hashlib import md5
+from itertools import count
+from typing import Optional
+
+from parallel import ordered_map
+
+CHUNK_SIZE = 2 ** 16
+
+
+def digest_limit(zeros: int) -> bytes:
+    """
+    Digests (compared as big-endian bytes) with at least the given number of
+    leading zero hex digits are exactly those below this limit.
+    """
+    if zeros == 0:
+        # Longer than any digest, so every digest compares below it
+        return b"\xff" * 17
+    return (1 << 4 * (32 - zeros)).to_bytes(16, "big")
+
+
+def search_range(
+        prefix: str,
+        zeros: int,
+        start: int,
+        stop: int
+) -> list[tuple[int, str]]:
+    """
+    Returns the nonces in the given range (with their hex digests) whose hashes
+    have at least the given number of leading zero hex digits.
+    """
+    limit = digest_limit(zeros)
+    base = md5(prefix.encode("utf-8"))
+    copy = base.copy
+
+    matches = []
+    for n in range(start, stop):
+        h = copy()
+        h.update(str(n).encode())
+        digest = h.digest()
+        if digest < limit:
+            matches.append((n, digest.hex()))
+
+    return matches
+
+
+def find(
+        prefix: str,
+        zeros: int,
+        start: int = 0,
+        workers: Optional[int] = None,
+        chunk_size: int = CHUNK_SIZE
+) -> Iterator[tuple[int, str]]:
+    """
+    Yields every nonce from `start` onwards (with its hex digest) whose hash
+    has at least the given number of leading zero hex digits, in nonce order.
+    The caller decides how many matches it needs and stops iterating, at which
+    point any outstanding work is cancelled.
+    """
+    chunks = ordered_map(
+        search_range,
+        ((prefix, zeros, chunk_start, chunk_start + chunk_size)
+         for chunk_start in count(start, chunk_size)),
+        workers)
+    for matches in chunks:
+        yield from matches
@@ -0,0 +1,72 @@
+"""
+Ordered parallel map over a pool of processes, as used by the searches that
+try candidates in increasing order until one succeeds (2015 days 4 and 20,
+2016 days 5, 14 and 25).
+
+Tasks are submitted in order with a bounded number in flight and their results
+are yielded in that same order, so the first result satisfying the caller is
+the same one a serial search would find, however the tasks were scheduled.
+The argument iterable may be infinite; the caller stops iterating once it has
+what it needs, at which point any outstanding work is cancelled.
+"""
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+import os
+from typing import Any, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Overrides the default number of processes, so that the runner can keep the
+# pools of parts it runs side by side (or measures) from multiplying
+WORKERS_ENV = "AOC_WORKERS"
+
+
+def default_workers() -> int:
+    """
+    The number of processes to use when the caller doesn't say, from
+    `WORKERS_ENV` if it's set and the number of CPUs otherwise.
+    """
+    return int(os.environ.get(WORKERS_ENV, 0)) or os.cpu_count() or 1
+
+
+def ordered_map(
+        func: Callable[..., T],
+        args: Iterable[tuple[Any, ...]],
+        workers: Optional[int] = None,
+        initializer: Optional[Callable[..., None]] = None,
+        initargs: tuple[Any, ...] = ()
+) -> Iterator[T]:
+    """
+    Yields `func(*a)` for each tuple `a` of `args`, in order. With more than
+    one worker the calls are made ahead of the consumer across a pool of
+    processes, each of which runs `initializer(*initargs)` first. With a single
+    worker they're made lazily in this process, after running the initializer
+    here.
+    """
+    workers = workers or default_workers()
+
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for a in args:
+            yield func(*a)
+        return
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=initializer, initargs=initargs)
+    try:
+        pending: deque[Future[T]] = deque()
+        remaining = iter(args)
+        while True:
+            # Keep every worker busy, with some spare for uneven tasks
+            pending.extend(
+                executor.submit(func, *a)
+                for a in islice(remaining, 2 * workers - len(pending)))
+            if not pending:
+                return
+
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
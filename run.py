@@ -0,0 +1,1032 @@
+"""
+Runner for every solution in the repository.
+
+Solutions are discovered from the `YYYY/dayNN.py` files via their `YEAR`,
+`DAY` and `NAME` constants and the `(label, filename, func, expected)` tuples
+iterated over in each `main()`. Every part is run in a process pool, longest
+recorded parts first, and the results are reported as a table.
+
+    python run.py                       # everything
+    python run.py 2015 2016/11          # a whole year and a single day
+    python run.py --format json 2023    # machine-readable output
+
+Parts can also be benchmarked, taking repeated samples after some warmup runs
+and saving them as a per-year baseline, and later compared against that
+baseline to flag statistically significant slowdowns.
+
+    python run.py bench 2023/23 --repeats 20
+    python run.py compare 2023/23
+
+Parts can be profiled too, under cProfile (writing pstats) and/or a sampling
+profiler (writing collapsed stacks that flamegraph tools accept), with the
+output for each part written to `PROFILE_DIR/YEAR/DAY/INDEX.*`.
+
+    python run.py profile 2016/11 --profiler sampling
+
+Running with `--memory` also reports the tracemalloc peak and the growth in
+peak RSS of each part, failing any part that exceeds its memory budget. Parts
+that search across their own pool of processes use a single process while
+measured (and when profiled), so that none of their work goes unseen, and
+otherwise share the CPUs with the parts run alongside them.
+
+    python run.py --memory --memory-budget 512 2015
+
+Functions named in the `CACHEABLE` constant of a solution module, which take
+the input text and do the parsing and graph building for a part, have their
+results cached on disk, keyed by the source of the module (and any local
+modules it imports), the function and a hash of the input, so that later parts
+and runs skip that work entirely. The results of parts are cached the same
+way, keyed by the same sources, the input and the part, so that only parts
+whose code or input changed are run again. `--force` runs every part
+regardless and `--no-cache` disables both caches. Least recently used entries
+are evicted after each run once past a maximum age or total size.
+"""
+import argparse
+import ast
+import resource
+import cProfile
+import csv
+import hashlib
+import importlib.util
+import json
+import os
+import pickle
+import statistics
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from functools import partial, wraps
+from pathlib import Path
+from time import perf_counter, perf_counter_ns, time
+from types import FrameType, ModuleType
+from typing import Any, Callable, TypeVar
+
+from parallel import WORKERS_ENV
+
+ROOT = Path(__file__).parent
+CACHE_DIR = ROOT / ".aoc-cache"
+TIMINGS_PATH = CACHE_DIR / "timings.json"
+PROFILE_DIR = CACHE_DIR / "profiles"
+PARSED_DIR = CACHE_DIR / "parsed"
+RESULTS_DIR = CACHE_DIR / "results"
+
+COMMANDS = ("run", "bench", "compare", "profile")
+
+Part = tuple[str, str, Callable[[str], Any], Any]
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class PartRef:
+    """
+    Picklable reference to a single part of a solution, i.e. one entry of the
+    tuple iterated over in the `main()` of a solution module.
+    """
+    year: int
+    day: int
+    index: int
+    label: str
+    filename: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.year}/{self.day:02}/{self.index}"
+
+    @property
+    def path(self) -> Path:
+        return ROOT / str(self.year) / f"day{self.day:02}.py"
+
+
+@dataclass
+class Result:
+    key: str
+    year: int
+    day: int
+    index: int
+    label: str
+    filename: str
+    status: str
+    result: Any
+    expected: Any
+    seconds: float
+    error: str = ""
+    peak_memory: int | None = None
+    rss_delta: int | None = None
+    cached: bool = False
+
+
+@dataclass
+class Benchmark:
+    key: str
+    year: int
+    day: int
+    index: int
+    label: str
+    filename: str
+    status: str
+    samples: list[int] = field(default_factory=list)
+    error: str = ""
+
+    @property
+    def stats(self) -> dict[str, float]:
+        """
+        Summary statistics of the samples, in milliseconds.
+        """
+        if not self.samples:
+            return {}
+        ms = sorted(s / 1e6 for s in self.samples)
+        return {
+            "min": ms[0],
+            "median": statistics.median(ms),
+            "p95": ms[min(len(ms) - 1, round(0.95 * (len(ms) - 1)))],
+            "mean": statistics.fmean(ms),
+            "stddev": statistics.stdev(ms) if len(ms) > 1 else 0.0,
+        }
+
+
+@dataclass
+class Profile:
+    key: str
+    year: int
+    day: int
+    index: int
+    label: str
+    filename: str
+    status: str
+    seconds: float = 0.0
+    num_samples: int = 0
+    outputs: list[str] = field(default_factory=list)
+    error: str = ""
+
+
+class Sampler:
+    """
+    Minimal sampling profiler. A background thread periodically captures the
+    stack of the profiled thread, counting identical stacks so that they can be
+    written out in the collapsed format (`outer;...;inner count`) read by
+    flamegraph tools. Only frames below the frame that started the sampler are
+    recorded.
+    """
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._ident = 0
+        self._root: FrameType | None = None
+        self._switch_interval = 0.0
+
+    def __enter__(self) -> "Sampler":
+        self._ident = threading.get_ident()
+        self._root = sys._getframe(1)
+        # The sampler can't run any more often than the GIL is handed over
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 2))
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._ident)
+            stack = []
+            while frame is not None and frame is not self._root:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                outermost = code.co_filename
+                frame = frame.f_back
+            # Ignore samples taken while entering or exiting the sampler
+            if stack and outermost != __file__:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(
+            f"{stack} {n}\n" for stack, n in sorted(self.stacks.items())
+        )
+
+
+_modules: dict[Path, ModuleType] = {}
+
+
+def load_module(path: Path) -> ModuleType:
+    """
+    Imports a solution module from its path. The year directories aren't
+    packages (and aren't valid identifiers) so each module is registered under
+    a synthetic name instead, e.g. `aoc2015_day04`.
+    """
+    if path in _modules:
+        return _modules[path]
+
+    # Solutions can import shared modules from their year directory, as they
+    # would when run as scripts, and from the repository root
+    for directory in (path.parent, ROOT):
+        if str(directory) not in sys.path:
+            sys.path.append(str(directory))
+
+    name = f"aoc{path.parent.name}_{path.stem}"
+    spec = importlib.util.spec_from_file_location(name, path)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    # Registered before execution so that dataclasses et al. can resolve the
+    # module by name.
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    _modules[path] = module
+    return module
+
+
+def module_parts(module: ModuleType) -> list[Part]:
+    """
+    Extracts the `(label, filename, func, expected)` tuples from the `for` loop
+    in the `main()` of a solution module, evaluating them in the namespace of
+    the module so that `partial(...)` wrappers and the like resolve.
+    """
+    source = Path(module.__file__ or "").read_text()
+    tree = ast.parse(source)
+
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == "main":
+            for statement in node.body:
+                if isinstance(statement, ast.For):
+                    expression = ast.Expression(statement.iter)
+                    code = compile(expression, module.__file__ or "", "eval")
+                    return list(eval(code, vars(module)))
+
+    raise RuntimeError(f"No parts found in main() of '{module.__file__}'")
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """
+    Writes a cache entry via a rename so that concurrent workers never see a
+    partially written entry.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    tmp_path.replace(path)
+
+
+def touch(path: Path) -> None:
+    """
+    Marks a cache entry as recently used for eviction.
+    """
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def prune_cache(max_age: float, max_size: float) -> None:
+    """
+    Evicts entries from the parsed and results caches that haven't been used
+    in `max_age` days, then the least recently used entries until the caches
+    total no more than `max_size` MiB.
+    """
+    entries = [
+        (stat.st_mtime, stat.st_size, path)
+        for directory in (PARSED_DIR, RESULTS_DIR) if directory.exists()
+        for path in directory.iterdir()
+        for stat in (path.stat(),)
+    ]
+
+    now = time()
+    total = sum(size for _, size, _ in entries)
+    for mtime, size, path in sorted(entries):
+        if now - mtime > max_age * 86400 or total > max_size * 2 ** 20:
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def cached(func: Callable[..., T], source_hash: str) -> Callable[..., T]:
+    """
+    Wraps a function of a solution module that takes the puzzle input as its
+    first argument, so that its results are pickled to the parsed cache, keyed
+    by the hash of the module source, the name of the function, a hash of the
+    input and the `repr` of any further (simple) arguments such as flags. Any
+    change to the module or the input invalidates the entry, and a hit skips
+    the parsing along with everything else the function does.
+    Every call returns a freshly unpickled copy, as callers are free to mutate
+    what they get back (e.g. pruning a graph). Results that can't be pickled
+    are just returned uncached.
+    """
+    memory: dict[str, bytes] = {}
+
+    @wraps(func)
+    def wrapper(input: str, *args: Any, **kwargs: Any) -> T:
+        h = hashlib.sha256(
+            f"{source_hash}:{func.__qualname__}:{args!r}:"
+            f"{sorted(kwargs.items())!r}:".encode()
+        )
+        h.update(hashlib.sha256(input.encode()).digest())
+        key = h.hexdigest()
+        path = PARSED_DIR / f"{key}.pickle"
+
+        if key not in memory and path.exists():
+            memory[key] = path.read_bytes()
+            touch(path)
+        if key in memory:
+            return pickle.loads(memory[key])  # type: ignore[no-any-return]
+
+        result = func(input, *args, **kwargs)
+        try:
+            data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError,
+                RecursionError):
+            return result
+
+        memory[key] = data
+        PARSED_DIR.mkdir(parents=True, exist_ok=True)
+        # Written via a rename so that concurrent workers never see a partial
+        # entry
+        write_atomic(path, data)
+        return result
+
+    setattr(wrapper, "cached", True)
+    return wrapper
+
+
+def local_modules(module: ModuleType) -> list[ModuleType]:
+    """
+    Returns the module along with every module from this repository that it
+    imports, directly or through other local modules, either as a whole or by
+    importing names from it. Sorted by path.
+    """
+    found: dict[str, ModuleType] = {}
+    pending = [module]
+    while pending:
+        current = pending.pop()
+        path = getattr(current, "__file__", None)
+        if path is None or path in found:
+            continue
+        found[path] = current
+        for value in vars(current).values():
+            if not isinstance(value, ModuleType):
+                name = getattr(value, "__module__", None)
+                value = sys.modules.get(name) if name else None
+            if value is None:
+                continue
+            value_path = getattr(value, "__file__", None)
+            if value_path and Path(value_path).is_relative_to(ROOT):
+                pending.append(value)
+    return [found[path] for path in sorted(found)]
+
+
+def source_hash(module: ModuleType) -> str:
+    """
+    Returns a hash of the source of a solution module and of every local
+    module it imports (see local_modules()), so that changing a shared module
+    invalidates the cached results of every solution using it.
+    """
+    h = hashlib.sha256()
+    for local in local_modules(module):
+        source = Path(local.__file__ or "").read_bytes()
+        h.update(hashlib.sha256(source).digest())
+    return h.hexdigest()
+
+
+def install_cache(module: ModuleType) -> None:
+    """
+    Replaces the functions named in the `CACHEABLE` constant of a solution
+    module with cached versions. As calls within the module look up functions
+    in the module globals, the parts pick up the cached versions too.
+    """
+    digest = source_hash(module)
+
+    for name in getattr(module, "CACHEABLE", ()):
+        func = getattr(module, name)
+        if not getattr(func, "cached", False):
+            setattr(module, name, cached(func, digest))
+
+
+def discover(selectors: list[str]) -> list[PartRef]:
+    """
+    Finds every part of every solution matching any of the given selectors,
+    which are either a year (`2015`) or a year and day (`2015/4`). No
+    selectors matches everything.
+    """
+    wanted: list[tuple[int, int | None]] = []
+    for selector in selectors:
+        year, _, day = selector.partition("/")
+        wanted.append((int(year), int(day) if day else None))
+
+    refs: list[PartRef] = []
+    for path in sorted(ROOT.glob("[0-9][0-9][0-9][0-9]/day[0-9][0-9].py")):
+        module = load_module(path)
+        year, day = module.YEAR, module.DAY
+        if wanted and not any(
+            year == y and (d is None or day == d) for y, d in wanted
+        ):
+            continue
+        for index, (label, filename, _, _) in enumerate(module_parts(module)):
+            refs.append(PartRef(year, day, index, label, filename))
+
+    return refs
+
+
+def resolve(ref: PartRef, cache: bool) -> tuple[Part, Path]:
+    """
+    Returns the part tuple for a reference along with the path of its input,
+    optionally installing the parsed cache in its module first.
+    """
+    module = load_module(ref.path)
+    if cache:
+        install_cache(module)
+    part = module_parts(module)[ref.index]
+    return part, ref.path.parent / part[1]
+
+
+def max_rss() -> int:
+    """
+    Returns the peak resident set size of this process in bytes.
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in kilobytes everywhere except macOS
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def check(result: Any, expected: Any) -> str:
+    if expected is None:
+        return "done"
+    return "pass" if result == expected else "fail"
+
+
+def result_path(ref: PartRef, input_path: Path) -> Path:
+    """
+    Returns the path of the results cache entry for a part, keyed by the source
+    of its module (which includes the part definitions in `main()`) and the
+    local modules it imports, its input and its index.
+    """
+    h = hashlib.sha256(source_hash(load_module(ref.path)).encode())
+    h.update(hashlib.sha256(input_path.read_bytes()).digest())
+    h.update(str(ref.index).encode())
+    return RESULTS_DIR / f"{h.hexdigest()}.pickle"
+
+
+def run_part(
+        ref: PartRef,
+        cache: bool = True,
+        force: bool = False,
+        memory: bool = False,
+        budgets: dict[str, float] | None = None
+) -> Result:
+    """
+    Runs a single part and checks the result against the expected value. This
+    is the unit of work executed by the pool workers.
+    If `cache` is set a previously stored result for the same module source,
+    input and part is used instead of running the part, unless `force` is set
+    or memory is being measured, and new results are stored.
+    If `memory` is set the part is also run under tracemalloc, recording its
+    peak traced memory and the growth in peak RSS while it ran, and it fails
+    if the peak exceeds its budget (in MiB) in `budgets`, looked up by key,
+    then by year/day and then by "*".
+    """
+    def make_result(
+            status: str,
+            result: Any = None,
+            expected: Any = None,
+            seconds: float = 0.0,
+            error: str = "",
+    ) -> Result:
+        return Result(
+            ref.key, ref.year, ref.day, ref.index, ref.label, ref.filename,
+            status, result, expected, seconds, error
+        )
+
+    try:
+        (_, _, func, expected), input_path = resolve(ref, cache)
+        if not input_path.exists():
+            return make_result("missing", expected=expected)
+        contents = input_path.read_text()
+
+        stored = result_path(ref, input_path) if cache else None
+        if stored and stored.exists() and not force and not memory:
+            result, seconds = pickle.loads(stored.read_bytes())
+            touch(stored)
+            r = make_result(
+                check(result, expected), result, expected, seconds
+            )
+            r.cached = True
+            return r
+
+        if memory:
+            rss = max_rss()
+            tracemalloc.start()
+        try:
+            t1 = perf_counter()
+            result = func(contents)
+            t2 = perf_counter()
+        finally:
+            if memory:
+                _, peak_memory = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                rss_delta = max_rss() - rss
+    except Exception as e:
+        return make_result("error", error=f"{type(e).__name__}: {e}")
+
+    r = make_result(check(result, expected), result, expected, t2 - t1)
+
+    if stored and not memory:
+        try:
+            write_atomic(stored, pickle.dumps((result, r.seconds)))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            pass
+
+    if memory:
+        r.peak_memory = peak_memory
+        r.rss_delta = rss_delta
+        budgets = budgets or {}
+        day_key = ref.key.rpartition("/")[0]
+        budget = budgets.get(ref.key, budgets.get(day_key, budgets.get("*")))
+        if budget is not None and peak_memory > budget * 2 ** 20:
+            r.status = "fail"
+            r.error = f"Peak memory over budget of {budget}MiB"
+
+    return r
+
+
+def bench_part(
+        ref: PartRef,
+        warmups: int,
+        repeats: int,
+        cache: bool = True
+) -> Benchmark:
+    """
+    Runs a single part `warmups` times untimed and then `repeats` times timed,
+    recording every timed sample in nanoseconds.
+    """
+    benchmark = Benchmark(
+        ref.key, ref.year, ref.day, ref.index, ref.label, ref.filename, "done"
+    )
+
+    try:
+        (_, _, func, _), input_path = resolve(ref, cache)
+        if not input_path.exists():
+            benchmark.status = "missing"
+            return benchmark
+        contents = input_path.read_text()
+
+        for _ in range(warmups):
+            func(contents)
+        for _ in range(repeats):
+            t1 = perf_counter_ns()
+            func(contents)
+            t2 = perf_counter_ns()
+            benchmark.samples.append(t2 - t1)
+    except Exception as e:
+        benchmark.status = "error"
+        benchmark.error = f"{type(e).__name__}: {e}"
+
+    return benchmark
+
+
+def profile_part(
+        ref: PartRef,
+        profilers: tuple[str, ...],
+        interval: float,
+        output_dir: Path,
+        cache: bool = True
+) -> Profile:
+    """
+    Runs a single part once under each of the given profilers ("cprofile"
+    and/or "sampling"), writing `INDEX.pstats` and/or `INDEX.collapsed` to the
+    `YEAR/DAY` directory under the given output directory.
+    """
+    profile = Profile(
+        ref.key, ref.year, ref.day, ref.index, ref.label, ref.filename, "done"
+    )
+    part_dir = output_dir / str(ref.year) / f"{ref.day:02}"
+
+    try:
+        (_, _, func, _), input_path = resolve(ref, cache)
+        if not input_path.exists():
+            profile.status = "missing"
+            return profile
+        contents = input_path.read_text()
+        part_dir.mkdir(parents=True, exist_ok=True)
+
+        if "cprofile" in profilers:
+            profiler = cProfile.Profile()
+            t1 = perf_counter()
+            profiler.runcall(func, contents)
+            t2 = perf_counter()
+            path = part_dir / f"{ref.index}.pstats"
+            profiler.dump_stats(path)
+            profile.seconds = t2 - t1
+            profile.outputs.append(str(path))
+
+        if "sampling" in profilers:
+            t1 = perf_counter()
+            with Sampler(interval) as sampler:
+                func(contents)
+            t2 = perf_counter()
+            path = part_dir / f"{ref.index}.collapsed"
+            path.write_text(sampler.collapsed())
+            profile.seconds = t2 - t1
+            profile.num_samples = sum(sampler.stacks.values())
+            profile.outputs.append(str(path))
+    except Exception as e:
+        profile.status = "error"
+        profile.error = f"{type(e).__name__}: {e}"
+
+    return profile
+
+
+def baseline_path(year: int) -> Path:
+    return CACHE_DIR / f"baseline_{year}.json"
+
+
+def load_baseline(year: int) -> dict[str, list[int]]:
+    path = baseline_path(year)
+    if path.exists():
+        return dict(json.loads(path.read_text()))
+    return {}
+
+
+def save_baselines(benchmarks: list[Benchmark]) -> None:
+    """
+    Merges the samples of the given benchmarks into the baseline file of each
+    year, replacing the samples of any parts that were benchmarked again.
+    """
+    CACHE_DIR.mkdir(exist_ok=True)
+    for year in sorted(set(b.year for b in benchmarks)):
+        baseline = load_baseline(year)
+        for b in benchmarks:
+            if b.year == year and b.samples:
+                baseline[b.key] = b.samples
+        baseline_path(year).write_text(
+            json.dumps(baseline, indent=2, sort_keys=True)
+        )
+
+
+def mann_whitney_p(baseline: list[int], current: list[int]) -> float:
+    """
+    One-sided Mann-Whitney U test that the current samples are slower than the
+    baseline samples, using the normal approximation with a correction for
+    ties. Returns the p-value.
+    Timings are rarely normally distributed (there's a hard lower bound and a
+    long tail from scheduling noise), hence a rank-based test over a t-test.
+    """
+    n1, n2 = len(baseline), len(current)
+    samples = sorted(
+        [(s, 0) for s in baseline] + [(s, 1) for s in current]
+    )
+
+    # Assign ranks, averaging over ties
+    ranks = [0.0] * len(samples)
+    tie_sum = 0.0
+    i = 0
+    while i < len(samples):
+        j = i
+        while j + 1 < len(samples) and samples[j + 1][0] == samples[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        t = j - i + 1
+        tie_sum += t ** 3 - t
+        i = j + 1
+
+    r2 = sum(rank for rank, (_, group) in zip(ranks, samples) if group == 1)
+    u2 = r2 - n2 * (n2 + 1) / 2
+
+    n = n1 + n2
+    mean = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_sum / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+
+    z = (u2 - mean - 0.5) / variance ** 0.5
+    return 1.0 - statistics.NormalDist().cdf(z)
+
+
+def compare(
+        benchmarks: list[Benchmark],
+        alpha: float,
+        threshold: float
+) -> list[dict[str, Any]]:
+    """
+    Compares benchmarks against the saved baselines. A part is flagged as a
+    regression if its samples are significantly slower than the baseline at
+    the given significance level *and* its median has slowed by more than the
+    given fraction, so that tiny but consistent differences aren't reported.
+    """
+    baselines = {
+        year: load_baseline(year) for year in set(b.year for b in benchmarks)
+    }
+
+    rows = []
+    for b in benchmarks:
+        base = baselines[b.year].get(b.key)
+        if not b.samples or not base:
+            continue
+        base_median = statistics.median(base)
+        median = statistics.median(b.samples)
+        change = (median - base_median) / base_median
+        p = mann_whitney_p(base, b.samples)
+        rows.append({
+            "key": b.key,
+            "label": b.label,
+            "filename": b.filename,
+            "baseline_median": base_median / 1e6,
+            "median": median / 1e6,
+            "change": change,
+            "p": p,
+            "regression": p < alpha and change > threshold,
+        })
+
+    return rows
+
+
+def load_timings() -> dict[str, float]:
+    if TIMINGS_PATH.exists():
+        return dict(json.loads(TIMINGS_PATH.read_text()))
+    return {}
+
+
+def save_timings(timings: dict[str, float], results: list[Result]) -> None:
+    for r in results:
+        if r.status in ("pass", "fail", "done"):
+            timings[r.key] = r.seconds
+    CACHE_DIR.mkdir(exist_ok=True)
+    TIMINGS_PATH.write_text(json.dumps(timings, indent=2, sort_keys=True))
+
+
+def schedule(refs: list[PartRef], timings: dict[str, float]) -> list[PartRef]:
+    """
+    Orders parts longest first by their recorded timings so that the slowest
+    parts don't end up starting last and dominating the wall-clock time.
+    Parts with no recorded timing are assumed to be slow and go first.
+    """
+    return sorted(refs, key=lambda r: -timings.get(r.key, float("inf")))
+
+
+def solution_workers(
+        workers: int | None,
+        parts: int,
+        measuring: bool,
+        cpus: int | None = None
+) -> int:
+    """
+    Returns the number of processes each part may use for its own pool, with
+    at most `workers` of the `parts` being run at once, sharing out the CPUs
+    between the parts actually running side by side. Parts being measured get
+    one, so that all of their work happens in the process whose memory or
+    profile is recorded.
+
+    >>> solution_workers(None, 1, False, cpus=8)
+    8
+    >>> solution_workers(None, 50, False, cpus=8)
+    1
+    >>> solution_workers(2, 50, False, cpus=8)
+    4
+    >>> solution_workers(None, 1, True, cpus=8)
+    1
+    """
+    if measuring:
+        return 1
+    cpus = cpus or os.cpu_count() or 1
+    return max(1, cpus // max(1, min(workers or cpus, parts)))
+
+
+def run_all(
+        refs: list[PartRef],
+        workers: int | None,
+        func: Callable[[PartRef], T],
+        max_tasks_per_child: int | None = None,
+        measuring: bool = False
+) -> list[T]:
+    """
+    Runs the given function for every part across a process pool, returning
+    the results in the order of the given parts. The pools the parts start
+    themselves (see `parallel.ordered_map`) are sized by `solution_workers`.
+    """
+    os.environ[WORKERS_ENV] = str(
+        solution_workers(workers, len(refs), measuring))
+    with ProcessPoolExecutor(
+        max_workers=workers, max_tasks_per_child=max_tasks_per_child
+    ) as executor:
+        futures = {executor.submit(func, ref): ref for ref in refs}
+        results = {futures[f]: f.result() for f in as_completed(futures)}
+    return [results[ref] for ref in refs]
+
+
+def print_results(results: list[Result], format: str) -> None:
+    rows = [asdict(r) for r in results]
+
+    if format == "json":
+        print(json.dumps(rows, indent=2, default=str))
+    elif format == "csv":
+        writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        for r in results:
+            memory = (
+                f"{r.peak_memory / 2 ** 20:>10.1f}MiB peak"
+                f" {r.rss_delta / 2 ** 20:>10.1f}MiB rss"
+                if r.peak_memory is not None and r.rss_delta is not None
+                else ""
+            )
+            print(f"{r.key:<12} {r.label:<8} {r.filename:<28} {r.status:<8}",
+                  f"{(r.seconds*1000.0):>12.3f}ms", "(cached)" * r.cached,
+                  memory, r.result, r.error)
+        counts = {
+            s: sum(r.status == s for r in results)
+            for s in ("pass", "fail", "done", "error", "missing")
+        }
+        print(", ".join(f"{v} {k}" for k, v in counts.items()))
+
+
+def print_benchmarks(benchmarks: list[Benchmark], format: str) -> None:
+    rows: list[dict[str, Any]] = [
+        {"key": b.key, "label": b.label, "filename": b.filename,
+         "status": b.status, "repeats": len(b.samples), **b.stats,
+         "error": b.error}
+        for b in benchmarks
+    ]
+
+    if format == "json":
+        print(json.dumps(rows, indent=2))
+    elif format == "csv":
+        widest = max(rows, key=len)
+        fieldnames = list(widest)
+        writer = csv.DictWriter(sys.stdout, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        for b in benchmarks:
+            stats = "  ".join(f"{k} {v:10.3f}ms" for k, v in b.stats.items())
+            print(f"{b.key:<12} {b.label:<8} {b.filename:<28} {b.status:<8}",
+                  stats, b.error)
+
+
+def print_comparison(rows: list[dict[str, Any]], format: str) -> None:
+    if format == "json":
+        print(json.dumps(rows, indent=2))
+    elif format == "csv" and rows:
+        writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        for r in rows:
+            print(f"{r['key']:<12} {r['label']:<8} {r['filename']:<28}",
+                  f"{r['baseline_median']:10.3f}ms -> {r['median']:10.3f}ms",
+                  f"{r['change']:+8.1%}  p={r['p']:.4f}",
+                  "REGRESSION" if r["regression"] else "")
+
+
+def print_profiles(profiles: list[Profile], format: str) -> None:
+    rows = [asdict(p) for p in profiles]
+
+    if format == "json":
+        print(json.dumps(rows, indent=2))
+    elif format == "csv":
+        writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(
+            {**row, "outputs": " ".join(row["outputs"])} for row in rows
+        )
+    else:
+        for p in profiles:
+            print(f"{p.key:<12} {p.label:<8} {p.filename:<28} {p.status:<8}",
+                  f"{(p.seconds*1000.0):>12.3f}ms", *p.outputs, p.error)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    subparsers = parser.add_subparsers(dest="command")
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("selectors", nargs="*", metavar="YEAR[/DAY]")
+    common.add_argument("--format", choices=("text", "json", "csv"),
+                        default="text")
+    common.add_argument("--workers", type=int, default=None)
+    common.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="don't use cached results of CACHEABLE functions")
+
+    subparser = subparsers.add_parser(
+        "run", parents=[common], help="run and verify parts (default)")
+    subparser.add_argument("--memory", action="store_true",
+                           help="record the peak memory of each part")
+    subparser.add_argument("--memory-budget", type=float, metavar="MIB",
+                           help="fail parts whose peak memory exceeds this")
+    subparser.add_argument("--memory-budgets", type=Path, metavar="PATH",
+                           help="JSON file of per-part budgets in MiB, keyed "
+                                "by YEAR/DAY/INDEX, YEAR/DAY or *")
+    subparser.add_argument("--force", action="store_true",
+                           help="run parts even if their results are cached")
+    subparser.add_argument("--cache-max-age", type=float, default=30,
+                           metavar="DAYS",
+                           help="evict cache entries unused for this long "
+                                "(default: %(default)s)")
+    subparser.add_argument("--cache-max-size", type=float, default=256,
+                           metavar="MIB",
+                           help="evict least recently used cache entries "
+                                "beyond this size (default: %(default)s)")
+    for command, help in (
+        ("bench", "benchmark parts and save them as the baseline"),
+        ("compare", "benchmark parts and compare against the baseline"),
+    ):
+        subparser = subparsers.add_parser(command, parents=[common], help=help)
+        subparser.add_argument("--warmups", type=int, default=1)
+        subparser.add_argument("--repeats", type=int, default=10)
+    subparsers.choices["bench"].set_defaults(workers=1)
+    subparsers.choices["compare"].set_defaults(workers=1)
+    subparsers.choices["compare"].add_argument(
+        "--alpha", type=float, default=0.01,
+        help="significance level (default: %(default)s)")
+    subparsers.choices["compare"].add_argument(
+        "--threshold", type=float, default=0.05,
+        help="minimum relative slowdown of the median (default: %(default)s)")
+    subparser = subparsers.add_parser(
+        "profile", parents=[common], help="profile parts")
+    subparser.add_argument("--profiler", choices=("cprofile", "sampling"),
+                           action="append",
+                           help="profiler(s) to use (default: both)")
+    subparser.add_argument("--interval", type=float, default=0.001,
+                           help="sampling interval in seconds "
+                                "(default: %(default)s)")
+    subparser.add_argument("--output-dir", type=Path, default=PROFILE_DIR)
+
+    # Running is the default so keep `python run.py 2015` working
+    argv = sys.argv[1:]
+    if not argv or argv[0] not in COMMANDS + ("-h", "--help"):
+        argv = ["run"] + argv
+    args = parser.parse_args(argv)
+
+    refs = discover(args.selectors)
+    if not refs:
+        parser.error("No solutions matched")
+    timings = load_timings()
+    refs = schedule(refs, timings)
+
+    if args.command == "run":
+        budgets: dict[str, float] = {}
+        if args.memory_budgets:
+            budgets.update(json.loads(args.memory_budgets.read_text()))
+        if args.memory_budget is not None:
+            budgets["*"] = args.memory_budget
+        memory = args.memory or bool(budgets)
+
+        run = partial(
+            run_part,
+            cache=args.cache,
+            force=args.force,
+            memory=memory,
+            budgets=budgets
+        )
+        # A fresh worker per part when measuring memory so that the peak RSS
+        # of one part doesn't hide that of the next
+        results = run_all(
+            refs, args.workers, run, 1 if memory else None, memory)
+        results.sort(key=lambda r: (r.year, r.day, r.index))
+        # Timings under tracemalloc aren't representative
+        if not memory:
+            save_timings(timings, results)
+        prune_cache(args.cache_max_age, args.cache_max_size)
+        print_results(results, args.format)
+        if any(r.status in ("fail", "error") for r in results):
+            sys.exit(1)
+        return
+
+    if args.command == "profile":
+        profile = partial(
+            profile_part,
+            profilers=tuple(args.profiler or ("cprofile", "sampling")),
+            interval=args.interval,
+            output_dir=args.output_dir.resolve(),
+            cache=args.cache
+        )
+        profiles = run_all(refs, args.workers, profile, measuring=True)
+        profiles.sort(key=lambda p: (p.year, p.day, p.index))
+        print_profiles(profiles, args.format)
+        return
+
+    bench = partial(
+        bench_part,
+        warmups=args.warmups,
+        repeats=args.repeats,
+        cache=args.cache
+    )
+    benchmarks = run_all(refs, args.workers, bench)
+    benchmarks.sort(key=lambda b: (b.year, b.day, b.index))
+
+    if args.command == "bench":
+        save_baselines(benchmarks)
+        print_benchmarks(benchmarks, args.format)
+    else:
+        rows = compare(benchmarks, args.alpha, args.threshold)
+        print_comparison(rows, args.format)
+        if any(r["regression"] for r in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()